@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import csv
+from aggregates import update_aggregates
 
 
 def main():
@@ -95,6 +96,10 @@ def append_to_csv(filename, rating, comment):
         if not file_exists:
             writer.writerow(["Rating", "Review"])  # Include headers for two columns
         writer.writerow([rating, comment])  # Write data in two separate columns
+    # Keep the feedback summary read by the comparison dashboard up to date
+    update_aggregates(
+        filename, [{"Rating": rating, "Review": comment}], text_key="Review"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import pandas as pd
+
+AGGREGATES_SUFFIX = ".aggregates.json"
+
+# Rows read per chunk when aggregates have to be rebuilt from a file
+REBUILD_CHUNK_SIZE = 100_000
+
+_lock = threading.Lock()
+
+
+# A review's rating as an int, or None when it is missing or not a number
+def review_rating(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+# Running totals over a review dataset: rating histogram, feedback split and
+# review length/token sums. They only ever grow as reviews are appended, so
+# dashboards read a summary instead of rescanning every row
+class ReviewAggregates:
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get("count", 0)
+        self.ratings = {int(k): v for k, v in state.get("ratings", {}).items()}
+        self.feedback = {int(k): v for k, v in state.get("feedback", {}).items()}
+        self.length_sum = state.get("length_sum", 0)
+        self.token_sum = state.get("token_sum", 0)
+
+    def update(self, reviews, rating_key="Rating", text_key="Comments"):
+        for review in reviews:
+            self.count += 1
+            rating = review_rating(review.get(rating_key))
+            if rating is not None:
+                self.ratings[rating] = self.ratings.get(rating, 0) + 1
+                feedback = 1 if rating > 2 else 0
+                self.feedback[feedback] = self.feedback.get(feedback, 0) + 1
+            text = review.get(text_key)
+            if isinstance(text, str):
+                self.length_sum += len(text)
+                self.token_sum += len(text.split())
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        for rating, count in other.ratings.items():
+            self.ratings[rating] = self.ratings.get(rating, 0) + count
+        for feedback, count in other.feedback.items():
+            self.feedback[feedback] = self.feedback.get(feedback, 0) + count
+        self.length_sum += other.length_sum
+        self.token_sum += other.token_sum
+        return self
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "ratings": self.ratings,
+            "feedback": self.feedback,
+            "length_sum": self.length_sum,
+            "token_sum": self.token_sum,
+        }
+
+    def rating_counts(self):
+        return pd.Series(self.ratings, dtype="int64").sort_index()
+
+    def rated(self):
+        return sum(self.ratings.values())
+
+    def mean_rating(self):
+        rated = self.rated()
+        return sum(r * c for r, c in self.ratings.items()) / rated if rated else 0.0
+
+    # Number of reviews rated between low and high, both included
+    def count_ratings(self, low=None, high=None):
+        return sum(
+            c
+            for r, c in self.ratings.items()
+            if (low is None or r >= low) and (high is None or r <= high)
+        )
+
+    def mean_length(self):
+        return self.length_sum / self.count if self.count else 0.0
+
+    def mean_tokens(self):
+        return self.token_sum / self.count if self.count else 0.0
+
+
+def aggregates_path(csv_path):
+    return os.path.splitext(csv_path)[0] + AGGREGATES_SUFFIX
+
+
+def _source_stat(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# Save aggregates together with the size and mtime of the file they describe,
+# so a file changed behind our back is detected and rebuilt
+def save_aggregates(csv_path, aggregates):
+    state = {"source": _source_stat(csv_path), **aggregates.to_dict()}
+    path = aggregates_path(csv_path)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(tmp_path, path)
+
+
+def rebuild_aggregates(csv_path, rating_key="Rating", text_key="Comments"):
+    aggregates = ReviewAggregates()
+    try:
+        chunks = pd.read_csv(
+            csv_path, usecols=[rating_key, text_key], chunksize=REBUILD_CHUNK_SIZE
+        )
+        for chunk in chunks:
+            aggregates.update(chunk.to_dict("records"), rating_key, text_key)
+    except pd.errors.EmptyDataError:
+        pass
+    return aggregates
+
+
+# Aggregates of csv_path from its saved file, rebuilt when missing or stale;
+# callers hold _lock
+def _load_aggregates(csv_path, rating_key, text_key):
+    try:
+        with open(aggregates_path(csv_path), encoding="utf-8") as file:
+            state = json.load(file)
+        if state["source"] == _source_stat(csv_path):
+            return ReviewAggregates(state)
+    except (OSError, ValueError, KeyError):
+        pass
+    aggregates = rebuild_aggregates(csv_path, rating_key, text_key)
+    save_aggregates(csv_path, aggregates)
+    return aggregates
+
+
+def load_aggregates(csv_path, rating_key="Rating", text_key="Comments"):
+    with _lock:
+        return _load_aggregates(csv_path, rating_key, text_key)
+
+
+# Fold reviews that were just appended to csv_path into its aggregates. Read,
+# update and save happen under one lock so concurrent appends are not lost
+def update_aggregates(csv_path, reviews, rating_key="Rating", text_key="Comments"):
+    with _lock:
+        try:
+            with open(aggregates_path(csv_path), encoding="utf-8") as file:
+                aggregates = ReviewAggregates(json.load(file))
+        except (OSError, ValueError, KeyError):
+            # Nothing to update yet, so build them from the whole file once
+            return _load_aggregates(csv_path, rating_key, text_key)
+        aggregates.update(reviews, rating_key, text_key)
+        save_aggregates(csv_path, aggregates)
+        return aggregates
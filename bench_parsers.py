@@ -0,0 +1,88 @@
+import argparse
+import glob
+import json
+import os
+import time
+from urllib.parse import urlparse
+from http_cache import CACHE_DIR
+from review_parsers import PARSER_BACKENDS, PARSERS
+
+# Compare the review parser backends on saved pages: every backend must produce
+# the same records as the full-tree reference, and we report the parse times.
+#
+#   python bench_parsers.py                      # pages stored in the HTTP cache
+#   python bench_parsers.py amazon:page1.html    # saved pages, prefixed by site
+
+
+def site_of(url):
+    hostname = urlparse(url).hostname or ""
+    for site in PARSERS:
+        if site in hostname:
+            return site
+    return None
+
+
+def cached_pages(cache_dir):
+    pages = []
+    for index_path in glob.glob(os.path.join(cache_dir, "index", "*", "*.json")):
+        with open(index_path, encoding="utf-8") as file:
+            entry = json.load(file)
+        site = site_of(entry["url"])
+        if site:
+            body_path = os.path.join(
+                cache_dir, "bodies", entry["body"][:2], entry["body"]
+            )
+            pages.append((site, body_path))
+    return pages
+
+
+def time_parser(parser, content, backend, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        records = parser(content, backend=backend)
+    return records, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare review parser backends")
+    parser.add_argument("pages", nargs="*", help="saved pages as site:path")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = [tuple(page.split(":", 1)) for page in args.pages]
+    if not pages:
+        pages = cached_pages(args.cache_dir)
+    if not pages:
+        print("No saved pages found")
+        return 1
+
+    totals = {backend: 0.0 for backend in PARSER_BACKENDS}
+    mismatches = 0
+    for site, path in pages:
+        with open(path, "rb") as file:
+            content = file.read()
+        results = {}
+        for backend in PARSER_BACKENDS:
+            records, elapsed = time_parser(
+                PARSERS[site], content, backend, args.repeat
+            )
+            results[backend] = records
+            totals[backend] += elapsed
+        expected = results["full"]
+        for backend, records in results.items():
+            if records != expected:
+                mismatches += 1
+                print(f"MISMATCH {backend} on {path} ({site})")
+        print(f"{site:9} {len(expected):4} reviews  {os.path.basename(path)}")
+
+    print(f"\n{len(pages)} pages, mean parse time per page:")
+    for backend in PARSER_BACKENDS:
+        mean = totals[backend] / len(pages)
+        speedup = totals["full"] / totals[backend] if totals[backend] else 0
+        print(f"  {backend:9} {mean * 1000:8.2f} ms  x{speedup:.1f}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+import argparse
+import time
+import pandas as pd
+from hf_sentiment import DEFAULT_BATCH_SIZE, MODEL_NAME, SentimentScorer
+
+# Throughput of Hugging Face sentiment scoring in reviews per second: the
+# one-review-per-call pipeline the notebook used against the batched scorer,
+# with and without int8 quantization. Batched labels must match the pipeline.
+#
+#   python bench_sentiment.py                        # 500 reviews, all modes
+#   python bench_sentiment.py data/reviews.csv --sample 2000 --threads 8
+
+# Share of reviews the unquantized batched scorer may label differently
+MAX_DISAGREEMENT = 0.01
+
+
+def pipeline_labels(texts, model_name):
+    from transformers import pipeline
+
+    sentiment_analysis = pipeline("sentiment-analysis", model=model_name)
+    return [sentiment_analysis(text)[0]["label"] for text in texts]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentiment scoring")
+    parser.add_argument("input", nargs="?", default="data/sentiment_analysis.csv")
+    parser.add_argument("--column", default="Comments")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--sample", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--skip-pipeline", action="store_true")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.input, usecols=[args.column], nrows=args.sample)
+    texts = texts[args.column].dropna().astype(str).tolist()
+    if not texts:
+        print("No reviews found")
+        return 1
+
+    results = {}
+    if not args.skip_pipeline:
+        results["pipeline"] = timed(pipeline_labels, texts, args.model)
+    for mode, quantize in (("batched", False), ("quantized", True)):
+        scorer = SentimentScorer(args.model, args.batch_size, quantize, args.threads)
+        (labels, _), elapsed = timed(scorer.score, texts)
+        results[mode] = labels, elapsed
+
+    print(f"{len(texts)} reviews, batch size {args.batch_size}")
+    reference = results.get("pipeline", results["batched"])
+    failed = False
+    for mode, (labels, elapsed) in results.items():
+        agreement = sum(a == b for a, b in zip(labels, reference[0])) / len(texts)
+        speedup = reference[1] / elapsed if elapsed else 0
+        print(
+            f"  {mode:9} {len(texts) / elapsed:8.1f} reviews/s  x{speedup:.1f}  "
+            f"{agreement:.1%} same labels"
+        )
+        if mode == "batched" and agreement < 1 - MAX_DISAGREEMENT:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
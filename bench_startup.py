@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Measure the cold import time of each Streamlit entry point in fresh
+# interpreters, and fail when one got slower than the saved baseline or when it
+# loads a heavy dependency at startup that should only load on first use.
+# Timings depend on the machine, so the baseline is not committed: record one
+# with --save-baseline on the machine that runs the comparison. Without a
+# baseline only the deferred imports are checked.
+#
+#   python bench_startup.py --save-baseline   # record the current timings
+#   python bench_startup.py                   # compare with the baseline
+
+ENTRY_POINTS = ["main", "abtesting", "results", "website"]
+
+# Modules that must not be imported just by starting an entry point
+DEFERRED_MODULES = [
+    "langchain",
+    "langchain_openai",
+    "langchain_community",
+    "docx",
+    "seaborn",
+    "sklearn",
+    "wordcloud",
+    "matplotlib",
+    "bs4",
+]
+
+BASELINE_PATH = "bench_startup_baseline.json"
+
+# Allowed slowdown over the baseline before the benchmark fails
+DEFAULT_TOLERANCE = 0.25
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+# Import an entry point in a fresh interpreter and return the import time and
+# the top-level packages it loaded
+def probe(module):
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    packages = {name.split(".")[0] for name in report["modules"]}
+    return report["seconds"], packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark entry point imports")
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    elif not args.save_baseline:
+        print(
+            f"No baseline at {args.baseline}, timings are not compared; "
+            "record one with --save-baseline"
+        )
+
+    timings = {}
+    failures = 0
+    for module in args.entry_points:
+        try:
+            runs = [probe(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            failures += 1
+            print(f"{module:10} FAILED  {e}")
+            continue
+        seconds = statistics.median(elapsed for elapsed, _ in runs)
+        timings[module] = seconds
+        line = f"{module:10} {seconds * 1000:8.1f} ms"
+        if module in baseline:
+            limit = baseline[module] * (1 + args.tolerance)
+            line += f"  (baseline {baseline[module] * 1000:.1f} ms)"
+            if seconds > limit and not args.save_baseline:
+                failures += 1
+                line += "  REGRESSION"
+        print(line)
+        loaded = sorted(set(DEFERRED_MODULES) & runs[0][1])
+        if loaded:
+            failures += 1
+            print(f"{'':10} loads at startup: {', '.join(loaded)}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({**baseline, **timings}, file, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
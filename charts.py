@@ -0,0 +1,65 @@
+from io import BytesIO
+import numpy as np
+from matplotlib.figure import Figure
+from sklearn.feature_extraction.text import CountVectorizer
+from wordcloud import STOPWORDS, WordCloud
+
+# Terms kept in a word cloud's frequency table
+MAX_TERMS = 500
+
+
+# Stopword-filtered term frequencies of the reviews, most frequent first; each
+# review counts weights[i] times when given
+def term_frequencies(comments, max_terms=MAX_TERMS, weights=None):
+    vectorizer = CountVectorizer(
+        stop_words=sorted(STOPWORDS), token_pattern=r"(?u)\b[^\W\d_][\w']+\b"
+    )
+    try:
+        counts = vectorizer.fit_transform(comments)
+    except ValueError:
+        # Every review was empty or made of stop words only
+        return {}
+    if weights is None:
+        totals = counts.sum(axis=0).A1
+    else:
+        totals = counts.T @ np.asarray(weights, dtype=float)
+    terms = vectorizer.get_feature_names_out()
+    top = totals.argsort()[::-1][:max_terms]
+    return {terms[i]: int(totals[i]) for i in top}
+
+
+# Render a word cloud straight from a frequency table to PNG bytes, without
+# re-tokenizing the reviews or going through a matplotlib figure
+def wordcloud_png(frequencies, width=1000, height=500, background_color="white"):
+    if not frequencies:
+        return None
+    wordcloud = WordCloud(
+        width=width, height=height, background_color=background_color
+    ).generate_from_frequencies(frequencies)
+    buf = BytesIO()
+    wordcloud.to_image().save(buf, format="png")
+    return buf.getvalue()
+
+
+# Figures are created outside pyplot's global registry, so nothing keeps them
+# alive once their bytes have been rendered
+def new_figure(figsize=None):
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
+
+def figure_png(fig):
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    fig.clear()
+    return buf.getvalue()
+
+
+# Bar chart of a pandas Series rendered to PNG bytes
+def bar_chart_png(series, title, xlabel, ylabel, color="red"):
+    fig, ax = new_figure()
+    series.plot.bar(color=color, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    return figure_png(fig)
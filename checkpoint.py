@@ -0,0 +1,173 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from aggregates import ReviewAggregates
+from http_cache import normalize_url
+
+# Where per-product checkpoints and ingested reviews are kept
+CHECKPOINT_DIR = "Data/checkpoints"
+
+REVIEW_FIELDS = ["Name", "Rating", "Comments"]
+
+
+# Stable identity of a review, insensitive to whitespace and case changes
+def review_fingerprint(review):
+    text = "|".join(
+        re.sub(r"\s+", " ", str(review.get(field, ""))).strip().lower()
+        for field in REVIEW_FIELDS
+    )
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Key of a product's checkpoint files; every spelling of its URL shares it
+def checkpoint_key(url):
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:16]
+
+
+_product_locks = {}
+_product_locks_lock = threading.Lock()
+
+
+# Hold the locks of the products' checkpoints, so that two jobs never load,
+# record into and read back the same checkpoint at once; a job for a product
+# already being scraped waits for that scrape to finish
+@contextmanager
+def product_locks(urls):
+    keys = sorted({checkpoint_key(url) for url in urls})
+    with _product_locks_lock:
+        locks = [_product_locks.setdefault(key, threading.Lock()) for key in keys]
+    with ExitStack() as stack:
+        for lock in locks:
+            stack.enter_context(lock)
+        yield
+
+
+# Persistent scrape state for one product URL: the last page reached, whether
+# the crawl ran to the end, the fingerprints of every review ingested and the
+# running aggregates of those reviews. The fingerprints go to an append-only
+# log, so saving after each page only rewrites the small state
+class ScrapeCheckpoint:
+    def __init__(self, url, checkpoint_dir=CHECKPOINT_DIR):
+        key = checkpoint_key(url)
+        self.url = url
+        self.path = os.path.join(checkpoint_dir, f"{key}.json")
+        self.reviews_path = os.path.join(checkpoint_dir, f"{key}.csv")
+        self.seen_path = os.path.join(checkpoint_dir, f"{key}.seen")
+        self.last_page = 0
+        self.complete = False
+        self.refreshing = False
+        self.seen = set()
+        self.aggregates = ReviewAggregates()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as file:
+                state = json.load(file)
+            self.last_page = state["last_page"]
+            self.complete = state["complete"]
+            self.refreshing = state.get("refreshing", False)
+            if os.path.exists(self.seen_path):
+                with open(self.seen_path, encoding="utf-8") as file:
+                    self.seen = set(file.read().split())
+            if "aggregates" in state:
+                self.aggregates = ReviewAggregates(state["aggregates"])
+            else:
+                # Checkpoint written before aggregates were kept
+                for chunk in self.iter_reviews(1000):
+                    self.aggregates.update(chunk)
+            if "seen" in state:
+                # Checkpoint written before the fingerprints had their own log
+                fingerprints = set(state["seen"]) - self.seen
+                self._append_seen(fingerprints)
+                self.seen |= fingerprints
+                self.save()
+
+    # An interrupted crawl picks up after the last page it reached; otherwise we
+    # refresh from page 1 and stop at the first page of known reviews
+    def resuming(self, page_limit):
+        return not self.complete and 0 < self.last_page < page_limit
+
+    def start_page(self, page_limit):
+        return self.last_page + 1 if self.resuming(page_limit) else 1
+
+    # A refresh starts over from page 1 and leaves the checkpoint incomplete
+    # until it reaches known reviews, so an interrupted refresh resumes after
+    # the last page it stored instead of stopping at page 1 next time
+    def start_refresh(self):
+        self.complete = False
+        self.refreshing = bool(self.seen)
+        self.last_page = 0
+        self.save()
+
+    # Store the unseen reviews of a page and return them
+    def record_page(self, page, reviews):
+        new_reviews = []
+        fingerprints = []
+        for review in reviews:
+            fingerprint = review_fingerprint(review)
+            if fingerprint not in self.seen:
+                self.seen.add(fingerprint)
+                fingerprints.append(fingerprint)
+                new_reviews.append(review)
+        # Reviews are stored before they are marked seen, so a crash in
+        # between can only store a page twice, never lose it
+        self._append_reviews(new_reviews)
+        self._append_seen(fingerprints)
+        self.aggregates.update(new_reviews)
+        self.last_page = max(self.last_page, page)
+        self.save()
+        return new_reviews
+
+    def finish(self):
+        self.complete = True
+        self.refreshing = False
+        self.save()
+
+    # Stream the reviews ingested so far, chunk_size records at a time
+    def iter_reviews(self, chunk_size):
+        if not os.path.exists(self.reviews_path):
+            return
+        with open(self.reviews_path, newline="", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+
+    def _append_reviews(self, reviews):
+        if not reviews:
+            return
+        os.makedirs(os.path.dirname(self.reviews_path), exist_ok=True)
+        file_exists = os.path.isfile(self.reviews_path)
+        with open(self.reviews_path, "a", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(
+                file, fieldnames=REVIEW_FIELDS, extrasaction="ignore"
+            )
+            if not file_exists:
+                writer.writeheader()
+            writer.writerows(reviews)
+
+    def _append_seen(self, fingerprints):
+        if not fingerprints:
+            return
+        os.makedirs(os.path.dirname(self.seen_path), exist_ok=True)
+        with open(self.seen_path, "a", encoding="utf-8") as file:
+            file.write("".join(f"{fingerprint}\n" for fingerprint in fingerprints))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        state = {
+            "url": self.url,
+            "last_page": self.last_page,
+            "complete": self.complete,
+            "refreshing": self.refreshing,
+            "aggregates": self.aggregates.to_dict(),
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(tmp_path, self.path)
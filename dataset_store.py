@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import pandas as pd
+
+# Where scraped datasets are kept for every session of the server to browse
+DATASET_STORE_PATH = "Data/datasets.sqlite"
+
+# Completed datasets kept in the store; older ones are dropped
+DEFAULT_RETAINED = 8
+
+# Rows shown on one page of the viewer
+DEFAULT_PAGE_SIZE = 50
+
+# Sort keys offered by the viewer, mapped to the SQL they sort on
+SORT_KEYS = {
+    "row": "row",
+    "rating": "rating",
+    "name": "name",
+    "length": "length(comments)",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    rows INTEGER NOT NULL DEFAULT 0,
+    complete INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dataset_rows (
+    dataset_id TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    name TEXT,
+    rating INTEGER,
+    comments TEXT,
+    PRIMARY KEY (dataset_id, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dataset_rows_rating
+    ON dataset_rows (dataset_id, rating, row);
+"""
+
+
+# Server-side store of scraped datasets. A dataset is written in chunks while
+# a scrape runs and only becomes visible once it is complete; sessions keep its
+# id and read it a page at a time, with filters and sorting done in SQL
+class DatasetStore:
+    def __init__(self, path=DATASET_STORE_PATH, retained=DEFAULT_RETAINED):
+        self.retained = retained
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+
+    def create(self, source=None):
+        dataset_id = uuid.uuid4().hex
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO datasets (id, source, created_at) VALUES (?, ?, ?)",
+                (dataset_id, source, time.time()),
+            )
+        return dataset_id
+
+    def append(self, dataset_id, rows, start):
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO dataset_rows (dataset_id, row, name, rating, comments) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (dataset_id, start + i, name, rating, comments)
+                    for i, (name, rating, comments) in enumerate(rows)
+                ),
+            )
+
+    # Make a dataset visible and drop the oldest ones beyond the retained count;
+    # returns the sources of the dropped datasets
+    def complete(self, dataset_id, rows):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE datasets SET complete = 1, rows = ? WHERE id = ?",
+                (rows, dataset_id),
+            )
+            expired = self.connection.execute(
+                "SELECT id, source FROM datasets WHERE complete = 1 "
+                "ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                (self.retained,),
+            ).fetchall()
+            for expired_id, _ in expired:
+                self._delete(expired_id)
+        return [source for _, source in expired]
+
+    def discard(self, dataset_id):
+        with self.lock, self.connection:
+            self._delete(dataset_id)
+
+    def _delete(self, dataset_id):
+        self.connection.execute(
+            "DELETE FROM dataset_rows WHERE dataset_id = ?", (dataset_id,)
+        )
+        self.connection.execute("DELETE FROM datasets WHERE id = ?", (dataset_id,))
+
+    def exists(self, dataset_id):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM datasets WHERE id = ? AND complete = 1", (dataset_id,)
+            ).fetchone()
+        return row is not None
+
+    def _where(self, dataset_id, min_rating, max_rating, text):
+        clauses = ["dataset_id = ?"]
+        params = [dataset_id]
+        if min_rating is not None:
+            clauses.append("rating >= ?")
+            params.append(min_rating)
+        if max_rating is not None:
+            clauses.append("rating <= ?")
+            params.append(max_rating)
+        if text:
+            clauses.append("comments LIKE ? ESCAPE '\\'")
+            escaped = (
+                text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            params.append(f"%{escaped}%")
+        return " AND ".join(clauses), params
+
+    def count(self, dataset_id, min_rating=None, max_rating=None, text=None):
+        where, params = self._where(dataset_id, min_rating, max_rating, text)
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT count(*) FROM dataset_rows WHERE {where}", params
+            ).fetchone()[0]
+
+    # One page of a dataset, filtered by rating range and comment text and
+    # sorted by one of SORT_KEYS; ties keep the scraped order
+    def page(
+        self,
+        dataset_id,
+        page=0,
+        page_size=DEFAULT_PAGE_SIZE,
+        min_rating=None,
+        max_rating=None,
+        text=None,
+        sort_by="row",
+        descending=False,
+    ):
+        where, params = self._where(dataset_id, min_rating, max_rating, text)
+        order = f"{SORT_KEYS[sort_by]} {'DESC' if descending else 'ASC'}"
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT name, rating, comments FROM dataset_rows "
+                f"WHERE {where} ORDER BY {order}, row LIMIT ? OFFSET ?",
+                params + [page_size, page * page_size],
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["Name", "Rating", "Comments"])
+
+
+_dataset_store = None
+_dataset_store_lock = threading.Lock()
+
+
+def get_dataset_store():
+    global _dataset_store
+    with _dataset_store_lock:
+        if _dataset_store is None:
+            _dataset_store = DatasetStore()
+    return _dataset_store
@@ -1,15 +1,29 @@
-from langchain.chains import LLMChain
+import re
+import time
+from urllib.parse import urlparse
 from langchain.llms import OpenAI
 from langchain.agents import initialize_agent, AgentType
 from langchain_community.tools import DuckDuckGoSearchResults, Tool
 from langchain.prompts import PromptTemplate
 
-# Initialize the language model
-llm = OpenAI(model="gpt-3.5-turbo", api_key="your_openai_api_key")
-
 # Define the DuckDuckGo search tool
 ddg_search = DuckDuckGoSearchResults()
 
+# Number of search results looked at by the fast path
+MAX_RESULTS = 10
+
+# Minimum share of the product name's words a result title must contain for
+# the fast path to trust it; below this the name is treated as ambiguous
+MIN_NAME_MATCH = 0.6
+
+# URL patterns of product detail pages, which beat search and listing pages
+PRODUCT_PAGE_PATTERNS = (
+    re.compile(r"/dp/[A-Z0-9]{10}"),
+    re.compile(r"/gp/product/[A-Z0-9]{10}"),
+    re.compile(r"/p/itm[0-9a-z]+"),
+)
+
+
 # Define a simple tool to filter results to get only Amazon and Flipkart URLs
 def filter_results(search_results):
     filtered_urls = []
@@ -18,31 +32,138 @@ def filter_results(search_results):
             filtered_urls.append(result['url'])
     return filtered_urls
 
+
 filter_tool = Tool.from_function(
     func=filter_results,
     name="FilterAmazonFlipkart",
     description="Filters search results to get only Amazon and Flipkart URLs"
 )
 
-# Combine tools into a toolkit
-tools = [ddg_search, filter_tool]
-
 # Define the prompt template
 prompt_template = PromptTemplate.from_template(
     "Find and list the best purchase links for the product {product_name}."
 )
 
-# Initialize the agent
-agent = initialize_agent(
-    tools=tools,
-    agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    llm=llm,
-    prompt_template=prompt_template,
-    verbose=True
-)
+_agent = None
+
+
+# The agent is only built the first time a name needs the fallback
+def get_agent():
+    global _agent
+    if _agent is None:
+        # Initialize the language model
+        llm = OpenAI(model="gpt-3.5-turbo", api_key="your_openai_api_key")
+
+        # Combine tools into a toolkit
+        tools = [ddg_search, filter_tool]
+
+        # Initialize the agent
+        _agent = initialize_agent(
+            tools=tools,
+            agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+            llm=llm,
+            prompt_template=prompt_template,
+            verbose=True
+        )
+    return _agent
+
+
+def name_tokens(text):
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+# Share of the product name's words found in the result's title and URL
+def name_match(product_name, result):
+    wanted = name_tokens(product_name)
+    if not wanted:
+        return 0.0
+    found = name_tokens(result.get('title', '')) | name_tokens(result['url'])
+    return len(wanted & found) / len(wanted)
+
+
+def rank_score(product_name, result):
+    score = name_match(product_name, result)
+    if any(pattern.search(result['url']) for pattern in PRODUCT_PAGE_PATTERNS):
+        score += 0.5
+    return score
+
+
+def search(product_name):
+    results = ddg_search.api_wrapper.results(
+        f"{product_name} buy online", max_results=MAX_RESULTS
+    )
+    return [{'url': r['link'], 'title': r.get('title', '')} for r in results]
+
+
+# Deterministic search -> filter -> rank resolution; returns the best URL per
+# site, or None when the results are too weak to decide without the agent
+def fast_resolve(product_name, search_results):
+    kept = set(filter_results(search_results))
+    best = {}
+    for result in search_results:
+        if result['url'] not in kept:
+            continue
+        if name_match(product_name, result) < MIN_NAME_MATCH:
+            continue
+        site = urlparse(result['url']).hostname.replace("www.", "")
+        score = rank_score(product_name, result)
+        if site not in best or score > best[site][0]:
+            best[site] = (score, result['url'])
+    if not best:
+        return None
+    return [url for score, url in sorted(best.values(), reverse=True)]
+
+
+def agent_resolve(product_name):
+    response = get_agent().run({"product_name": product_name})
+    urls = re.findall(r"https?://[^\s'\"\]\),]+", str(response))
+    return filter_results([{'url': url} for url in urls])
+
+
+# Counts how names were resolved and how long each path took
+class ResolverStats:
+    def __init__(self):
+        self.fast = []
+        self.fallback = []
+
+    def record(self, path, seconds):
+        getattr(self, path).append(seconds)
+
+    def report(self):
+        total = len(self.fast) + len(self.fallback)
+        if not total:
+            print("No products resolved yet")
+            return
+        print(f"Fast path hit rate: {len(self.fast) / total:.0%} of {total}")
+        for path in ("fast", "fallback"):
+            latencies = sorted(getattr(self, path))
+            if latencies:
+                mean = sum(latencies) / len(latencies)
+                p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                print(f"  {path:8} mean {mean:.2f}s  p95 {p95:.2f}s")
+
+
+stats = ResolverStats()
+
+
+# Resolve purchase links without the LLM whenever the search results are
+# clear, and only fall back to the agent for ambiguous names
+def resolve_product_links(product_name):
+    start = time.perf_counter()
+    urls = fast_resolve(product_name, search(product_name))
+    if urls is not None:
+        stats.record("fast", time.perf_counter() - start)
+        return urls
+
+    urls = agent_resolve(product_name)
+    stats.record("fallback", time.perf_counter() - start)
+    return urls
+
 
-# Run the agent with your input
-product_name = "Samsung Galaxy S22"
-response = agent.run({"product_name": product_name})
+if __name__ == "__main__":
+    # Run the resolver with your input
+    product_name = "Samsung Galaxy S22"
+    response = resolve_product_links(product_name)
 
-print("Filtered URLs:", response)
+    print("Filtered URLs:", response)
+    stats.report()
@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import os
+import pickle
+import re
+import threading
+import zlib
+import numpy as np
+import pandas as pd
+
+# Where the incremental dedup index is kept between scrapes
+DEDUP_INDEX_PATH = "Data/dedup_index.pkl"
+
+# Number of MinHash permutations, split into bands of rows for LSH; 16 bands
+# of 8 rows make pairs above ~0.7 Jaccard similarity very likely to collide
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Estimated Jaccard similarity above which two reviews are the same review
+DEFAULT_THRESHOLD = 0.8
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(42)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def normalize_text(text):
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+def text_key(text):
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text):
+    words = normalize_text(text).split()
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+# MinHash signature; crc32 keeps the shingle hashes stable across processes so
+# signatures stored in the index stay comparable
+def minhash(text):
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles(text)),
+        dtype=np.uint64,
+    )
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+# Incremental LSH index: every distinct review text is mapped to the canonical
+# review it duplicates, so each scrape only hashes texts never seen before
+class DedupIndex:
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.canonical = {}
+        self.signatures = {}
+        self.buckets = {}
+
+    @classmethod
+    def load(cls, path=DEDUP_INDEX_PATH):
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                return pickle.load(file)
+        return cls()
+
+    def save(self, path=DEDUP_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(self, file)
+        os.replace(tmp_path, path)
+
+    def _band_keys(self, signature):
+        return [
+            (band, signature[band * ROWS : (band + 1) * ROWS].tobytes())
+            for band in range(BANDS)
+        ]
+
+    # Return the key of the canonical review this text belongs to
+    def add(self, text):
+        key = text_key(text)
+        if key in self.canonical:
+            return self.canonical[key]
+
+        signature = minhash(text)
+        band_keys = self._band_keys(signature)
+        candidates = {
+            canonical
+            for band_key in band_keys
+            for canonical in self.buckets.get(band_key, ())
+        }
+        best, best_similarity = None, self.threshold
+        for canonical in candidates:
+            similarity = np.mean(self.signatures[canonical] == signature)
+            if similarity >= best_similarity:
+                best, best_similarity = canonical, similarity
+
+        if best is None:
+            # A new canonical review: only these are indexed in the buckets
+            best = key
+            self.signatures[key] = signature
+            for band_key in band_keys:
+                self.buckets.setdefault(band_key, []).append(key)
+        self.canonical[key] = best
+        return best
+
+
+# Collapse near-duplicate reviews: keep the first review of each cluster and
+# count how many reviews of the frame it stands for in a "multiplicity" column
+def dedupe_reviews(df, text_column="Comments", index=None):
+    index = index or DedupIndex()
+    clusters = df[text_column].map(index.add)
+    canonical = df.assign(multiplicity=clusters.map(clusters.value_counts()))
+    return canonical[~clusters.duplicated()].reset_index(drop=True)
+
+
+# Dedupe a review file against the persistent index
+def dedupe_file(input_path, output_path, text_column, index_path=DEDUP_INDEX_PATH):
+    index = DedupIndex.load(index_path)
+    df = pd.read_csv(input_path).dropna(subset=[text_column])
+    canonical = dedupe_reviews(df, text_column, index)
+    index.save(index_path)
+    canonical.to_csv(output_path, index=False)
+    print(f"{len(df)} reviews -> {len(canonical)} canonical reviews")
+    return canonical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collapse near-duplicate reviews")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--column", default="Comments")
+    parser.add_argument("--index", default=DEDUP_INDEX_PATH)
+    args = parser.parse_args()
+    dedupe_file(args.input, args.output, args.column, args.index)
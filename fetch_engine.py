@@ -0,0 +1,147 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Maximum number of pages fetched at the same time from one host
+DEFAULT_HOST_CONCURRENCY = 4
+
+# Maximum number of pages fetched for each product URL
+DEFAULT_PAGE_LIMIT = 2
+
+# What is appended to a product's review URL, followed by the page number, to
+# get one page of its reviews on each supported site
+PAGE_SUFFIXES = {
+    "amazon": "?th=1&pageNumber=",
+    "flipkart": "&page=",
+    "snapdeal": "?page=",
+}
+
+
+# A scrape job is one product URL together with the site scraper that handles
+# it and, optionally, the checkpoint that makes the scrape incremental. Page
+# URLs are built here only; the scraper is handed the URL of the page to fetch
+class ScrapeJob:
+    def __init__(self, scraper_func, url, url_suffix, checkpoint=None):
+        self.scraper_func = scraper_func
+        self.url = url
+        self.url_suffix = url_suffix
+        self.checkpoint = checkpoint
+        self.host = urlparse(url).hostname
+
+    def page_url(self, page):
+        return f"{self.url}{self.url_suffix}{page}"
+
+
+async def _fetch_page(loop, executor, semaphore, job, page, progress):
+    # The site scrapers are blocking, so each page runs on a worker thread
+    # while the semaphore caps how many of them hit the same host at once
+    async with semaphore:
+        try:
+            reviews = await loop.run_in_executor(
+                executor, job.scraper_func, job.page_url(page), page
+            )
+        except Exception as e:
+            print(f"Failed to scrape page {page} of {job.url}: {e}")
+            if progress is not None:
+                progress.error(f"Page {page} of {job.url}: {e}")
+            return None
+    if progress is not None:
+        progress.page_fetched(len(reviews))
+    return reviews
+
+
+async def _scrape_job(
+    loop, executor, semaphore, job, page_limit, window, on_reviews, progress
+):
+    checkpoint = job.checkpoint
+    resuming = checkpoint is not None and checkpoint.resuming(page_limit)
+    page = checkpoint.start_page(page_limit) if checkpoint else 1
+    if resuming:
+        print(f"Resuming {job.url} from page {page}")
+    elif checkpoint is not None:
+        checkpoint.start_refresh()
+    # A refresh, resumed or not, stops at the first page of known reviews
+    stop_at_known = not resuming or (checkpoint is not None and checkpoint.refreshing)
+
+    count = 0
+    while page <= page_limit:
+        pages = range(page, min(page + window, page_limit + 1))
+        results = await asyncio.gather(
+            *[
+                _fetch_page(loop, executor, semaphore, job, p, progress)
+                for p in pages
+            ]
+        )
+        for p, page_reviews in zip(pages, results):
+            # A failed page leaves the checkpoint where it was so the next run
+            # resumes from it
+            if page_reviews is None:
+                return count
+            # An empty page means we ran past the last page of reviews
+            if not page_reviews:
+                if checkpoint:
+                    checkpoint.finish()
+                return count
+            if checkpoint is None:
+                new_reviews = page_reviews
+            else:
+                new_reviews = checkpoint.record_page(p, page_reviews)
+            # Reviews are handed on page by page instead of being accumulated
+            if on_reviews is not None and new_reviews:
+                on_reviews(job, new_reviews)
+            count += len(new_reviews)
+            if checkpoint is None:
+                continue
+            # Reviews are listed newest first, so once a refresh meets reviews
+            # we already have, every later page is known too
+            if stop_at_known and len(new_reviews) < len(page_reviews):
+                print(f"Reached known reviews of {job.url} on page {p}")
+                checkpoint.finish()
+                return count
+        page += window
+    return count
+
+
+async def _scrape_jobs(jobs, page_limit, host_concurrency, on_reviews, progress):
+    loop = asyncio.get_running_loop()
+    semaphores = {}
+    for job in jobs:
+        if job.host not in semaphores:
+            semaphores[job.host] = asyncio.Semaphore(host_concurrency)
+
+    workers = max(1, host_concurrency * len(semaphores))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = await asyncio.gather(
+            *[
+                _scrape_job(
+                    loop,
+                    executor,
+                    semaphores[job.host],
+                    job,
+                    page_limit,
+                    host_concurrency,
+                    on_reviews,
+                    progress,
+                )
+                for job in jobs
+            ]
+        )
+    return sum(results)
+
+
+# Scrape every page of every job concurrently, passing each page's reviews to
+# on_reviews(job, reviews) as soon as it is parsed, and return how many there
+# were; jobs with a checkpoint only pass on reviews not ingested before.
+# progress, when given, is told about every fetched page and every failure
+def scrape_concurrently(
+    jobs,
+    page_limit=DEFAULT_PAGE_LIMIT,
+    host_concurrency=DEFAULT_HOST_CONCURRENCY,
+    on_reviews=None,
+    progress=None,
+):
+    if not jobs:
+        return 0
+    return asyncio.run(
+        _scrape_jobs(jobs, page_limit, host_concurrency, on_reviews, progress)
+    )
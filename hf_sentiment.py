@@ -0,0 +1,141 @@
+import argparse
+import os
+import pandas as pd
+
+# Star-rating classifier the sentiment notebook used
+MODEL_NAME = "LiYuan/amazon-review-sentiment-analysis"
+
+# Reviews per forward pass; batches are built from reviews of similar length
+DEFAULT_BATCH_SIZE = 32
+
+# Longest input the model accepts, in tokens
+MAX_LENGTH = 512
+
+# Rows read, scored and written at a time when scoring a file
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+# Use every core for the matrix maths inside an operator and a single thread
+# between operators, which suits batched inference of one model on CPU
+def configure_threads(threads=None):
+    import torch
+
+    torch.set_num_threads(threads or os.cpu_count() or 1)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only settable before torch runs its first parallel operation
+        pass
+
+
+# Batched sentiment scoring with a Hugging Face sequence classifier. Reviews
+# are tokenized once, sorted by length and batched so that each batch is
+# padded only to its own longest review; quantize=True swaps the linear layers
+# for dynamically quantized int8 ones, which is faster on CPU
+class SentimentScorer:
+    def __init__(
+        self,
+        model_name=MODEL_NAME,
+        batch_size=DEFAULT_BATCH_SIZE,
+        quantize=False,
+        threads=None,
+        max_length=MAX_LENGTH,
+    ):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        configure_threads(threads)
+        self.torch = torch
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model = model
+        self.labels = model.config.id2label
+
+    # Return the predicted label and its probability for every text, in order
+    def score(self, texts):
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        if not texts:
+            return [], []
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        keys = list(encoded.keys())
+        order = sorted(range(len(texts)), key=lambda i: len(encoded["input_ids"][i]))
+        labels = [None] * len(texts)
+        scores = [0.0] * len(texts)
+        with self.torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start : start + self.batch_size]
+                features = self.tokenizer.pad(
+                    [{key: encoded[key][i] for key in keys} for i in batch],
+                    return_tensors="pt",
+                )
+                logits = self.model(**features).logits
+                probabilities, predictions = logits.softmax(dim=-1).max(dim=-1)
+                for i, prediction, probability in zip(
+                    batch, predictions.tolist(), probabilities.tolist()
+                ):
+                    labels[i] = self.labels[prediction]
+                    scores[i] = probability
+        return labels, scores
+
+    # Add typed sentiment_label and sentiment_score columns to a frame
+    def score_frame(self, df, text_column="Comments"):
+        labels, scores = self.score(df[text_column].tolist())
+        return df.assign(
+            sentiment_label=labels,
+            sentiment_score=pd.Series(scores, index=df.index, dtype="float64"),
+        )
+
+
+# Score a review file chunk by chunk, so files larger than memory stream
+# through, and write the chunks to output_path as they are done
+def score_file(
+    input_path,
+    output_path,
+    scorer,
+    text_column="Comments",
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    rows = 0
+    try:
+        chunks = pd.read_csv(input_path, chunksize=chunk_size)
+    except pd.errors.EmptyDataError:
+        return 0
+    try:
+        for chunk in chunks:
+            scored = scorer.score_frame(chunk, text_column)
+            scored.to_csv(tmp_path, mode="a", header=rows == 0, index=False)
+            rows += len(scored)
+            print(f"Scored {rows} reviews")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if rows == 0:
+        return 0
+    os.replace(tmp_path, output_path)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score reviews with a HF model")
+    parser.add_argument("input", nargs="?", default="data/cleaned_reviews.csv")
+    parser.add_argument(
+        "output", nargs="?", default="data/sentiment_analysis_huggingface.csv"
+    )
+    parser.add_argument("--column", default="Comments")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--quantize", action="store_true")
+    args = parser.parse_args()
+    scorer = SentimentScorer(args.model, args.batch_size, args.quantize, args.threads)
+    score_file(args.input, args.output, scorer, args.column, args.chunk_size)
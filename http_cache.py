@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Where cached pages are stored on disk
+CACHE_DIR = os.environ.get("SCRAPER_CACHE_DIR", "Data/http_cache")
+
+# Seconds a cached page is served without asking the site again
+DEFAULT_TTL = float(os.environ.get("SCRAPER_CACHE_TTL", 6 * 60 * 60))
+
+# "default" serves fresh pages and revalidates stale ones, "refresh" always
+# revalidates, "replay" serves stored pages only and "off" bypasses the cache
+CACHE_MODES = ("default", "refresh", "replay", "off")
+
+# Query parameters that do not change the page content
+IGNORED_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content")
+
+
+class CacheMiss(Exception):
+    pass
+
+
+# Normalize a URL so equivalent spellings share one cache entry
+def normalize_url(url):
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in IGNORED_PARAMS
+    )
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path or "/",
+            urlencode(query),
+            "",
+        )
+    )
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+# Stand-in for requests.Response built from a cache entry
+class CachedResponse:
+    def __init__(self, entry, content):
+        self.url = entry["final_url"]
+        self.status_code = entry["status_code"]
+        self.headers = entry["headers"]
+        self.content = content
+        self.history = []
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+
+# Content-addressed page store: an index entry per normalized URL pointing at
+# a body file named after the hash of its content
+class ResponseCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, mode=None):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.mode = mode or os.environ.get("SCRAPER_CACHE_MODE", "default")
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {self.mode}")
+
+    def _index_path(self, url):
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "index", key[:2], f"{key}.json")
+
+    def _body_path(self, digest):
+        return os.path.join(self.cache_dir, "bodies", digest[:2], digest)
+
+    def lookup(self, url):
+        try:
+            with open(self._index_path(url), encoding="utf-8") as file:
+                entry = json.load(file)
+            with open(self._body_path(entry["body"]), "rb") as file:
+                content = file.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry, content
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    # Headers that let the site answer 304 Not Modified for a stale entry
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, response):
+        digest = hashlib.sha256(response.content).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            _write_atomic(body_path, response.content)
+        entry = {
+            "url": normalize_url(url),
+            "final_url": response.url,
+            "status_code": response.status_code,
+            "headers": {
+                "Content-Type": response.headers.get("Content-Type", "text/html")
+            },
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "body": digest,
+        }
+        _write_atomic(self._index_path(url), json.dumps(entry).encode("utf-8"))
+
+    # The site confirmed our copy is current, so restart its TTL
+    def touch(self, url, entry):
+        entry["fetched_at"] = time.time()
+        _write_atomic(self._index_path(url), json.dumps(entry).encode("utf-8"))
+
+
+response_cache = ResponseCache()
+
+
+def set_cache_mode(mode):
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode: {mode}")
+    response_cache.mode = mode
@@ -0,0 +1,116 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rate_limit import limiter
+from http_cache import CacheMiss, CachedResponse, normalize_url, response_cache
+
+# Advertise brotli only when urllib3 is able to decode it
+try:
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Headers sent by every scraper to mimic a web browser
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 20)
+
+# Number of hosts we keep a connection pool for
+POOL_CONNECTIONS = 10
+
+# Keep-alive connections kept open per host
+POOL_MAXSIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# Build the session with keep-alive pools and retries on connection errors
+def _build_session():
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    # Throttling responses are handled by the rate limiter, so only retry
+    # failures that never reached the server
+    retries = Retry(
+        total=2,
+        connect=2,
+        read=0,
+        status=0,
+        backoff_factor=0.5,
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared session used by all scrapers so connections are reused across pages
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+    return _session
+
+
+# Raises rate_limit.Throttled for throttled or blocked responses
+def _get(url, timeout, headers=None):
+    limiter.acquire(url)
+    response = get_session().get(url, headers=headers, timeout=timeout)
+    limiter.record_response(url, response)
+    return response
+
+
+# Fetch a page through the response cache and the shared session, respecting
+# the per-host rate limit whenever the network is used
+def fetch(url, timeout=DEFAULT_TIMEOUT, cache=response_cache):
+    if cache.mode == "off":
+        response = _get(url, timeout)
+        response.raise_for_status()
+        return response
+
+    cached = cache.lookup(url)
+    if cache.mode == "replay":
+        if cached is None:
+            raise CacheMiss(f"No stored page for {url}")
+        return CachedResponse(*cached)
+
+    if cached is None:
+        response = _get(url, timeout)
+    else:
+        entry, content = cached
+        if cache.mode == "default" and cache.is_fresh(entry):
+            return CachedResponse(entry, content)
+        response = _get(url, timeout, cache.conditional_headers(entry))
+        if response.status_code == 304:
+            cache.touch(url, entry)
+            return CachedResponse(entry, content)
+
+    # Error pages have no reviews; failing here keeps them from being read as
+    # the end of the reviews
+    response.raise_for_status()
+    # Only the page the URL itself served is stored, never one we were
+    # redirected to
+    if (
+        response.status_code == 200
+        and not response.history
+        and normalize_url(response.url) == normalize_url(url)
+    ):
+        cache.store(url, response)
+    return response
@@ -0,0 +1,95 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of scrape jobs that may run at the same time across all sessions
+DEFAULT_WORKERS = 4
+
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION = 60 * 60
+
+
+# Progress of one background job, updated by the worker thread and read by
+# the sessions polling it
+class JobProgress:
+    def __init__(self):
+        self.pages_fetched = 0
+        self.reviews_parsed = 0
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def page_fetched(self, reviews):
+        with self.lock:
+            self.pages_fetched += 1
+            self.reviews_parsed += reviews
+
+    def error(self, message):
+        with self.lock:
+            self.errors.append(message)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "pages_fetched": self.pages_fetched,
+                "reviews_parsed": self.reviews_parsed,
+                "errors": list(self.errors),
+            }
+
+
+class BackgroundJob:
+    def __init__(self, description):
+        self.id = uuid.uuid4().hex
+        self.description = description
+        self.status = "queued"
+        self.progress = JobProgress()
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+
+# Runs jobs on a shared thread pool so a long scrape never blocks the session
+# that started it, and several sessions' jobs run side by side
+class JobRunner:
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="scrape-job"
+        )
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    # Run func(*args, progress=job.progress) in the background
+    def submit(self, description, func, *args):
+        job = BackgroundJob(description)
+        with self.lock:
+            self._forget_old_jobs()
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, func, args)
+        return job.id
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, func, args):
+        job.status = "running"
+        try:
+            job.result = func(*args, progress=job.progress)
+            job.status = "done"
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = time.time()
+
+    def _forget_old_jobs(self):
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished and now - job.finished_at > JOB_RETENTION:
+                del self.jobs[job_id]
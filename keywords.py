@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, CountVectorizer
+
+# Number of ranked keywords written for the LLM
+DEFAULT_TOP_N = 200
+
+# Strength of the background prior used by the log-odds score
+PRIOR_STRENGTH = 100.0
+
+# Approximate prompt tokens the key-phrase list may take
+DEFAULT_TOKEN_BUDGET = 300
+
+# Negative reviews a phrase has to occur in before it can be a key phrase
+MIN_PHRASE_REVIEWS = 2
+
+# Log-odds z-score a key phrase needs: it leans negative at 95% confidence
+MIN_PHRASE_SCORE = 1.96
+
+# Stop words may sit inside a phrase ("stopped working after") but a phrase
+# cannot start or end with one; negations carry meaning and are kept
+NEGATIONS = {"no", "not", "nor", "never", "cannot"}
+PHRASE_STOP_WORDS = ENGLISH_STOP_WORDS - NEGATIONS
+
+
+# Sparse document-term counts for the reviews, summed per feedback class; each
+# review counts weights[i] times (its multiplicity after dedup) when given.
+# Also returns how many distinct negative reviews contain each term
+def class_term_counts(comments, feedback, weights=None, **vectorizer_args):
+    vectorizer_args.setdefault("stop_words", "english")
+    vectorizer = CountVectorizer(**vectorizer_args)
+    try:
+        counts = vectorizer.fit_transform(comments)
+    except ValueError:
+        # Every review was empty or made of stop words only
+        return np.array([], dtype=object), np.zeros(0), np.zeros(0), np.zeros(0)
+    feedback = np.asarray(feedback)
+    if weights is None:
+        weights = np.ones(len(feedback))
+    weights = np.asarray(weights, dtype=float)
+    negative = counts.T @ np.where(feedback == 0, weights, 0)
+    positive = counts.T @ np.where(feedback == 1, weights, 0)
+    negative_reviews = counts[feedback == 0].getnnz(axis=0)
+    return vectorizer.get_feature_names_out(), negative, positive, negative_reviews
+
+
+# Log-odds ratio with an informative Dirichlet prior (Monroe et al., 2008),
+# as a z-score: positive values lean negative-feedback, negative values lean
+# positive-feedback, and rare terms are shrunk towards zero
+def log_odds_scores(negative, positive, prior_strength=PRIOR_STRENGTH):
+    total = negative + positive
+    prior = prior_strength * total / max(total.sum(), 1) + 0.01
+    prior_sum = prior.sum()
+    n_negative, n_positive = negative.sum(), positive.sum()
+    negative_odds = np.log(negative + prior) - np.log(
+        n_negative + prior_sum - negative - prior
+    )
+    positive_odds = np.log(positive + prior) - np.log(
+        n_positive + prior_sum - positive - prior
+    )
+    variance = 1 / (negative + prior) + 1 / (positive + prior)
+    return (negative_odds - positive_odds) / np.sqrt(variance)
+
+
+# Table of every term with its per-class counts, the number of negative
+# reviews it occurs in and its log-odds score
+def keyword_table(comments, feedback, weights=None, **vectorizer_args):
+    terms, negative, positive, negative_reviews = class_term_counts(
+        comments, feedback, weights, **vectorizer_args
+    )
+    return pd.DataFrame(
+        {
+            "term": terms,
+            "negative": negative,
+            "positive": positive,
+            "negative_reviews": negative_reviews,
+            "score": log_odds_scores(negative, positive) if len(terms) else [],
+        }
+    )
+
+
+# Terms that only occur in negative (or only in positive) reviews, most
+# discriminative first
+def unique_keywords(comments, feedback, top_n=DEFAULT_TOP_N, weights=None):
+    table = keyword_table(comments, feedback, weights)
+    negative_only = table[(table["negative"] > 0) & (table["positive"] == 0)]
+    positive_only = table[(table["positive"] > 0) & (table["negative"] == 0)]
+    unique_negative = negative_only.sort_values("score", ascending=False)["term"]
+    unique_positive = positive_only.sort_values("score")["term"]
+    return unique_negative.head(top_n).tolist(), unique_positive.head(top_n).tolist()
+
+
+def _is_phrase(ngram):
+    words = ngram.split()
+    if len(words) == 1:
+        return words[0] not in ENGLISH_STOP_WORDS
+    return words[0] not in PHRASE_STOP_WORDS and words[-1] not in PHRASE_STOP_WORDS
+
+
+def _contains(phrase, other):
+    return f" {other} " in f" {phrase} "
+
+
+# Ranked phrases characteristic of negative reviews, compact enough for an LLM
+# prompt. Phrases of 1-3 words have to occur in min_reviews distinct negative
+# reviews and lean negative with a z-score above min_score; they are ranked by
+# that score times the log of their negative count. A phrase inside a better
+# one is dropped and a phrase containing better ones replaces them. The list
+# stops once it would exceed token_budget, counting a token per word and
+# separator. weights only scale the counts
+def key_phrases(
+    comments,
+    feedback,
+    token_budget=DEFAULT_TOKEN_BUDGET,
+    min_reviews=MIN_PHRASE_REVIEWS,
+    weights=None,
+    min_score=MIN_PHRASE_SCORE,
+):
+    table = keyword_table(
+        comments,
+        feedback,
+        weights,
+        stop_words=None,
+        ngram_range=(1, 3),
+        min_df=min_reviews,
+        token_pattern=r"(?u)\b[^\W\d_][\w']+\b",
+    )
+    table = table[
+        (table["negative_reviews"] >= min_reviews)
+        & (table["score"] > min_score)
+        & table["term"].map(_is_phrase)
+    ]
+    weight = table["score"] * np.log1p(table["negative"])
+    selected = []
+    used = 0
+    for phrase in table.loc[weight.sort_values(ascending=False).index, "term"]:
+        if any(_contains(other, phrase) for other in selected):
+            continue
+        replaced = [other for other in selected if _contains(phrase, other)]
+        cost = len(phrase.split()) + 1
+        refund = sum(len(other.split()) + 1 for other in replaced)
+        if used + cost - refund > token_budget:
+            break
+        selected = [other for other in selected if other not in replaced]
+        selected.append(phrase)
+        used += cost - refund
+    return selected
@@ -0,0 +1,122 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Where resolved product links are kept between runs
+LINK_CACHE_PATH = "Data/link_cache.sqlite"
+
+# Seconds a found link is trusted before searching again
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# Seconds a search that found nothing is remembered, so it is retried sooner
+DEFAULT_NEGATIVE_TTL = 24 * 60 * 60
+
+# Number of searches run at the same time by the batched resolver
+DEFAULT_SEARCH_WORKERS = 2
+
+
+# Queries that differ only in case or spacing share one cache entry
+def normalize_query(query):
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+# Persistent query -> link cache with TTLs; a missing link (None) is cached as
+# a negative entry with its own, shorter TTL
+class LinkCache:
+    def __init__(
+        self, path=LINK_CACHE_PATH, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS links ("
+                "query TEXT PRIMARY KEY, link TEXT, resolved_at REAL NOT NULL)"
+            )
+
+    # Return (True, link) for a live entry and (False, None) otherwise
+    def get(self, query):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT link, resolved_at FROM links WHERE query = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        if row is None:
+            return False, None
+        link, resolved_at = row
+        ttl = self.ttl if link else self.negative_ttl
+        if time.time() - resolved_at >= ttl:
+            return False, None
+        return True, link
+
+    def put(self, query, link):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO links (query, link, resolved_at) "
+                "VALUES (?, ?, ?)",
+                (normalize_query(query), link, time.time()),
+            )
+
+
+_link_cache = None
+_link_cache_lock = threading.Lock()
+
+
+def get_link_cache():
+    global _link_cache
+    with _link_cache_lock:
+        if _link_cache is None:
+            _link_cache = LinkCache()
+    return _link_cache
+
+
+# Resolve one query through the cache, searching only on a miss
+def cached_search(query, search_func, cache=None):
+    cache = cache or get_link_cache()
+    hit, link = cache.get(query)
+    if hit:
+        return link
+    link = search_func(query)
+    cache.put(query, link)
+    return link
+
+
+# Resolve many queries at once: identical queries are searched once, live
+# cache entries are not searched at all, and the rest run on a small pool
+def resolve_queries(queries, search_func, workers=DEFAULT_SEARCH_WORKERS, cache=None):
+    cache = cache or get_link_cache()
+    links = {}
+    missing = {}
+    for query in queries:
+        key = normalize_query(query)
+        if key in links or key in missing:
+            continue
+        hit, link = cache.get(key)
+        if hit:
+            links[key] = link
+        else:
+            missing[key] = query
+
+    print(f"Resolving {len(missing)} of {len(links) + len(missing)} unique queries")
+
+    def search(query):
+        try:
+            link = search_func(query)
+        except Exception as e:
+            # Failed searches are not cached so the next run tries again
+            print(f"Search failed for {query}: {e}")
+            return None
+        cache.put(query, link)
+        return link
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for key, link in zip(missing, executor.map(search, missing.values())):
+            links[key] = link
+
+    return {query: links[normalize_query(query)] for query in queries}
@@ -1,80 +1,191 @@
-from dotenv import load_dotenv
-from langchain.prompts import PromptTemplate
-import docx
 import pandas as pd
-from langchain_openai import ChatOpenAI
-from sklearn.feature_extraction.text import CountVectorizer
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
 import streamlit as st
-from langchain_community.document_loaders import TextLoader
-from io import StringIO
-import requests
-from io import BytesIO
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-import re
+import glob
+import os
 import time
+import uuid
+from job_runner import JobRunner
+from aggregates import ReviewAggregates, load_aggregates, save_aggregates
+from review_index import get_review_index, phrase_query
+from dataset_store import SORT_KEYS, get_dataset_store
+from fetch_engine import DEFAULT_HOST_CONCURRENCY, DEFAULT_PAGE_LIMIT, PAGE_SUFFIXES
 
+# Heavy dependencies (langchain, docx, sklearn, wordcloud, matplotlib, bs4,
+# requests, pyarrow) are imported by the functions that use them, so a cold
+# start only pays for what the first page actually shows
 
-def load_data():
-    data = pd.read_csv("Data/cleaned_reviews.csv")
+# Every scrape writes its dataset to its own files here, named after a fresh
+# id, so sessions only ever read the dataset their own handle points to
+DATASETS_DIR = "Data/datasets"
+
+# The latest dataset and its negative keywords are also published where the
+# notebooks, storage.py and the LLM pipeline read them
+LATEST_DATASET = "Data/cleaned_reviews.csv"
+LATEST_KEYWORDS = "unique_negative_keywords.txt"
+
+
+def new_dataset_path():
+    return os.path.join(DATASETS_DIR, f"{uuid.uuid4().hex}.csv")
+
+
+# Remove a dataset's CSV and the Parquet, aggregates and keyword files named
+# after it
+def remove_dataset_files(csv_path):
+    for path in glob.glob(f"{glob.escape(os.path.splitext(csv_path)[0])}.*"):
+        os.remove(path)
+
+
+# Identity of a dataset file's content, the cache key of what is derived from it
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def load_data(path, fingerprint):
+    data, unique_negative = prepare_data(path, fingerprint)
+    write_keywords(
+        os.path.splitext(path)[0] + ".negative_keywords.txt", unique_negative
+    )
+    if os.path.exists(LATEST_DATASET) and os.path.samefile(path, LATEST_DATASET):
+        write_keywords(LATEST_KEYWORDS, unique_negative)
+    return data
+
+
+# Prepared data and keywords are computed once per dataset version and shared
+# by every rerun and session until a new scrape lands
+@st.cache_data(max_entries=4, show_spinner=False)
+def prepare_data(path, fingerprint):
+    from dedup import DedupIndex, dedupe_reviews
+    from keywords import unique_keywords
+    from storage import read_columns
+
+    data = read_columns(path, ["Rating", "Comments"])
     data["feedback"] = data["Rating"].apply(lambda x: 1 if x > 2 else 0)
     data.dropna(inplace=True)
+    # Collapse reviews repeated across sites and pages; "multiplicity" keeps
+    # how many scraped reviews each canonical review stands for and weights
+    # the keywords and word cloud (the rating histogram comes from the
+    # aggregates, which already count every scraped review)
+    dedup_index = DedupIndex.load()
+    data = dedupe_reviews(data, "Comments", dedup_index)
+    dedup_index.save()
     data["length"] = data["Comments"].apply(len)
-    cv = CountVectorizer(stop_words="english")
 
-    # Combine all reviews for each feedback category and splitting them into individual words
-    neg_reviews = " ".join(
-        [review for review in data[data["feedback"] == 0]["Comments"]]
+    # Words from reviews which are present in one feedback category only,
+    # ranked by how strongly they point to that category
+    unique_negative, unique_positive = unique_keywords(
+        data["Comments"], data["feedback"], weights=data["multiplicity"]
     )
-    neg_reviews = neg_reviews.lower().split()
+    return data, unique_negative
 
-    pos_reviews = " ".join(
-        [review for review in data[data["feedback"] == 1]["Comments"]]
-    )
-    pos_reviews = pos_reviews.lower().split()
 
-    # Finding words from reviews which are present in that feedback category only
-    unique_negative = [x for x in neg_reviews if x not in pos_reviews]
-    unique_negative = " ".join(unique_negative)
+# Key phrases of the negative reviews, computed once per dataset version
+@st.cache_data(max_entries=4, show_spinner=False)
+def negative_key_phrases(path, fingerprint):
+    from keywords import key_phrases
 
-    unique_positive = [x for x in pos_reviews if x not in neg_reviews]
-    unique_positive = " ".join(unique_positive)
+    data, _ = prepare_data(path, fingerprint)
+    return key_phrases(
+        data["Comments"], data["feedback"], weights=data["multiplicity"]
+    )
 
-    # Assume unique_negative is a string containing all unique negative words separated by spaces
-    with open("unique_negative_keywords.txt", "w") as file:
-        file.write(unique_negative)
-    return data
+
+# Rewrite the keywords file only when its content changes
+def write_keywords(path, keywords):
+    text = " ".join(keywords)
+    if os.path.exists(path):
+        with open(path) as file:
+            if file.read() == text:
+                return
+    with open(path, "w") as file:
+        file.write(text)
 
 
 # Visualization functions
-def plot_rating_distribution(data):
-    fig, ax = plt.subplots()
-    data["Rating"].value_counts().plot.bar(color="red", ax=ax)
-    plt.title("Rating Distribution Count")
-    plt.xlabel("ratings")
-    plt.ylabel("Count")
+# Rendered rating histograms, keyed by dataset version
+@st.cache_data(max_entries=4, show_spinner=False)
+def rating_distribution_image(path, fingerprint):
+    from charts import bar_chart_png
+
+    return bar_chart_png(
+        load_aggregates(path).rating_counts(),
+        "Rating Distribution Count",
+        "ratings",
+        "Count",
+    )
+
+
+# The histogram comes from the dataset's maintained aggregates, so drawing it
+# never rescans the reviews. Simple bar charts use Streamlit's native chart and
+# skip matplotlib entirely; native=False renders the matplotlib version through
+# the render cache
+def plot_rating_distribution(path, aggregates, fingerprint, native=True):
     st.markdown("#### Rating Distribution graph", unsafe_allow_html=True)
-    buf = BytesIO()
-    fig.savefig(buf, format="png")
-    st.image(buf)
+    if native:
+        st.bar_chart(aggregates.rating_counts(), color="#ff0000")
+    else:
+        st.image(rating_distribution_image(path, fingerprint))
+
+
+def show_review_summary(aggregates):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Reviews", aggregates.count)
+    col2.metric("Average rating", f"{aggregates.mean_rating():.2f}")
+    col3.metric("Positive feedback", aggregates.feedback.get(1, 0))
+    col4.metric("Average length", f"{aggregates.mean_length():.0f} chars")
+
+
+# Term frequencies of the canonical reviews weighted by how many scraped
+# reviews each stands for, kept per dataset version
+@st.cache_data(max_entries=4, show_spinner=False)
+def wordcloud_frequencies(path, fingerprint):
+    from charts import term_frequencies
+
+    data, _ = prepare_data(path, fingerprint)
+    return term_frequencies(data["Comments"], weights=data["multiplicity"])
+
 
+# Rendered word clouds, keyed by dataset version and rendering parameters
+@st.cache_data(max_entries=16, show_spinner=False)
+def wordcloud_image(path, fingerprint, width=1000, height=500):
+    from charts import wordcloud_png
 
-def plot_wordcloud(data):
-    text = " ".join(review for review in data["Comments"])
-    wordcloud = WordCloud(background_color="white").generate(text)
-    fig = plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud, interpolation="bilinear")
-    plt.axis("off")
+    return wordcloud_png(wordcloud_frequencies(path, fingerprint), width, height)
+
+
+def plot_wordcloud(path, fingerprint):
     st.markdown("#### Key Phrases Word Cloud", unsafe_allow_html=True)
-    buf = BytesIO()
-    fig.savefig(buf, format="png")
-    st.image(buf)
+    image = wordcloud_image(path, fingerprint)
+    if image:
+        st.image(image)
+
+
+# Drill down from a keyword or word cloud term to the reviews that contain it,
+# answered by the full-text index instead of scanning the comments. The index
+# is shared by every scrape, so matches are limited to the dataset's products
+def show_review_search(dataset, fingerprint):
+    st.markdown("#### Review Search", unsafe_allow_html=True)
+    _, unique_negative = prepare_data(dataset.csv_path, fingerprint)
+    frequent = wordcloud_frequencies(dataset.csv_path, fingerprint)
+    keywords = list(dict.fromkeys(unique_negative[:50] + list(frequent)[:50]))
+    col1, col2 = st.columns(2)
+    keyword = col1.selectbox("Keyword", [""] + keywords)
+    text = col2.text_input("Or search for a phrase", value=keyword)
+    prefix = st.checkbox("Match words starting with the last word")
+    query = phrase_query(text, prefix)
+    if query is None:
+        return
+    index = get_review_index()
+    st.write(f"{index.count(query, sources=dataset.sources)} matching reviews")
+    results = index.search(query, sources=dataset.sources)
+    for review in results.itertuples():
+        st.markdown(f"**{review.Rating}/5** {review.Snippet}")
 
 
 def generate_improvement_suggestions(texts):
+    from langchain.prompts import PromptTemplate
+    from langchain_openai import ChatOpenAI
 
     template_string = """ You are an AI language model trained to analyze unique key phrases or words from the negative reviews of a product and generate snew product design for product improvements. \
     The unique key phrases or words from the negative reviews of a product are: {document} \
@@ -110,6 +221,8 @@ def generate_improvement_suggestions(texts):
 
 
 def read_word_document(file_path):
+    import docx
+
     doc = docx.Document(file_path)
     improvements = []
     temp_dict = {}
@@ -162,120 +275,33 @@ def determine_website(url):
         return None
 
 
-# Amazon review scraping function
+# Amazon review scraping function; url is the review page to fetch, as built
+# by ScrapeJob.page_url
 def amazon_review_scraper(url, page):
-    reviews = []
-    with requests.Session() as session:
-        # Set a user agent to mimic a web browser
-        session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0"
-            }
-        )
-        url = f"{url}&pageNumber={page}"
-        print(f"Accessing {url}")  # Debugging statement
-        response = session.get(url)
-        if response.url != url:
-            print(f"Redirected to {response.url} instead of {url}")
-        soup = BeautifulSoup(response.content, "lxml")
-
-        for review in soup.find_all("div", {"class": "a-section review aok-relative"}):
-            name_element = review.find("span", {"class": "a-profile-name"})
-            rating_element = review.find("i", {"data-hook": "review-star-rating"})
-            comments_element = review.find(
-                "div", {"class": "a-row a-spacing-small review-data"}
-            )
-
-            if name_element and rating_element and comments_element:
-                rating_text = rating_element.text.strip()
-                rating = int(float(rating_text.split(" ")[0]))
-                review_data = {
-                    "Name": name_element.text.strip(),
-                    "Rating": rating,
-                    "Comments": comments_element.text.strip(),
-                }
-            reviews.append(review_data)
+    from http_client import fetch
+    from review_parsers import parse_amazon_reviews
 
-            time.sleep(1)
-
-    return reviews
+    print(f"Accessing {url}")  # Debugging statement
+    response = fetch(url)
+    return parse_amazon_reviews(response.content)
 
 
 # Flipkart review scraping function
 def flipkart_review_scraper(url, page):
-    url = f"{url}{page}"
-
-    reviews = []
+    from http_client import fetch
+    from review_parsers import parse_flipkart_reviews
 
-    user_agent = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0"
-    }
-
-    response = requests.get(url=url, headers=user_agent)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    for review in soup.find_all(
-        "div", {"class": "_27M-vq"}
-    ):  # Updated class for review container
-        name = review.find(
-            "p", {"class": "_2sc7ZR _2V5EHH"}
-        ).text  # Updated class for reviewer's name
-        rating = review.find(
-            "div", {"class": "_3LWZlK"}
-        ).text  # Updated class for rating
-        comments = review.find(
-            "div", {"class": "t-ZTKy"}
-        ).text  # Updated class for review comments
-        comments = re.sub(
-            r"\s*READ\s+MORE\s*", "", comments
-        )  # Remove 'READ MORE' links if present
-
-        data = {
-            "Name": name,
-            "Rating": rating,
-            "Comments": comments.strip(),
-        }
-
-        reviews.append(data)
-
-    return reviews
+    response = fetch(url)
+    return parse_flipkart_reviews(response.content)
 
 
 # Snapdeal review scraping function
 def snapdeal_review_scraper(url, page):
-    url = f"{url}{page}"
-    reviews = []
-
-    user_agent = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0"
-    }
-
-    response = requests.get(url=url, headers=user_agent)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    reviews_skipped = 0  # Counter to track the number of reviews skipped
-
-    for review in soup.find_all("div", {"class": "user-review"}):
-        if reviews_skipped < 2:
-            reviews_skipped += 1
-            continue  # Skip the first two reviews
-
-        rating_elements = review.find_all("i", class_="sd-icon sd-icon-star active")
-        rating = len(rating_elements)
-        name = review.find("div", {"class": "_reviewUserName"}).get("title")
-        comments = review.find("p").text
+    from http_client import fetch
+    from review_parsers import parse_snapdeal_reviews
 
-        data = {
-            "Name": name,
-            "Rating": rating,
-            "Comments": comments,
-        }
-
-        reviews.append(data)
-
-    return reviews
+    response = fetch(url)
+    return parse_snapdeal_reviews(response.content)
 
 
 def main():
@@ -322,10 +348,20 @@ def main():
         if submit_link and product_link:
             initiate_scraping(product_link)
 
+    scraping = show_scraping_progress()
+
     # Display and Download Scraped Data Section
     st.header("View and Download Scraped Data")
-    if st.button("View Scraped Data"):
+    # Whether the data is open is kept in the session, so the reruns its
+    # filters, search and pager trigger keep showing it
+    if st.session_state.get("viewing_data"):
+        if st.button("Hide Scraped Data"):
+            st.session_state["viewing_data"] = False
+            st.rerun()
         display_csv()
+    elif st.button("View Scraped Data"):
+        st.session_state["viewing_data"] = True
+        st.rerun()
     download_csv()
 
     # Product Specification Section
@@ -334,88 +370,241 @@ def main():
         if st.button("View The Specification", key="product_spec"):
             view_product_specification()
 
+    # Poll the scrape job again shortly; it keeps running in the background
+    # whether or not this session is watching
+    if scraping:
+        time.sleep(1)
+        st.rerun()
+
 
-def scrape_reviews(urls):
-    url_suffix = ""
-    scraper_func = None
-    all_reviews = []
+def scrape_reviews(
+    urls,
+    page_limit=DEFAULT_PAGE_LIMIT,
+    host_concurrency=DEFAULT_HOST_CONCURRENCY,
+    progress=None,
+):
+    from checkpoint import checkpoint_key, product_locks
+
+    products = {}
     for url in urls:
         website = determine_website(url)
         if not website:
             print(f"Unsupported website for URL: {url}")
             continue
+        # A product asked for twice, under any spelling, is scraped once
+        products.setdefault(checkpoint_key(url), (website, url))
+
+    # Jobs of other sessions for the same products wait until this one has
+    # read its dataset out of the shared checkpoints
+    products = list(products.values())
+    with product_locks([url for _, url in products]):
+        return scrape_products(products, page_limit, host_concurrency, progress)
+
+
+# Scrape (website, url) products whose checkpoints the caller has locked and
+# store every review ingested for them as a new dataset
+def scrape_products(products, page_limit, host_concurrency, progress):
+    from checkpoint import ScrapeCheckpoint
+    from fetch_engine import ScrapeJob, scrape_concurrently
+    from review_sink import ReviewSink, publish_dataset
 
+    jobs = []
+    for website, url in products:
         print(f"Scraping {website} reviews from {url}")
 
+        # The checkpoint remembers what was already ingested for this product
+        checkpoint = ScrapeCheckpoint(url)
+        suffix = PAGE_SUFFIXES[website]
         if website == "amazon":
-            scraper_func = amazon_review_scraper
-            url_suffix = "?th=1&pageNumber="
+            jobs.append(ScrapeJob(amazon_review_scraper, url, suffix, checkpoint))
         elif website == "flipkart":
-            scraper_func = flipkart_review_scraper
-            url_suffix = "&page="
+            jobs.append(ScrapeJob(flipkart_review_scraper, url, suffix, checkpoint))
         elif website == "snapdeal":
-            scraper_func = snapdeal_review_scraper
-            url_suffix = "?page="
+            jobs.append(ScrapeJob(snapdeal_review_scraper, url, suffix, checkpoint))
 
-        # Assuming we are scraping only the first 3 pages for demonstration
-        for page in range(1, 3):
-            full_url = f"{url}{url_suffix}{page}"
-            reviews = scraper_func(full_url, page)
-            all_reviews.extend(reviews)
+    # New reviews go into the search index as each page arrives; reviews
+    # stored before a product was indexed are indexed once up front
+    index = get_review_index()
+    for job in jobs:
+        index.add_checkpoint(job.checkpoint)
 
-    # Convert list of reviews to a DataFrame and save to CSV string
-    reviews_df = pd.DataFrame(all_reviews)
-    reviews_df.to_csv("Data/cleaned_reviews.csv", index=False)
-    csv_string = reviews_df.to_csv(index=False)
-    return csv_string
+    def index_reviews(job, reviews):
+        index.add_reviews(reviews, source=job.url)
 
-
-# Function to initiate scraping and save the results
+    # Pages are fetched concurrently, capped per host and by the page limit,
+    # and reviews we have not seen before are stored as each page arrives
+    new_reviews = scrape_concurrently(
+        jobs, page_limit, host_concurrency, index_reviews, progress
+    )
+    print(f"Found {new_reviews} new reviews")
+
+    # The dataset is every review ingested so far for the requested products,
+    # streamed from the per-product stores in chunks into files of its own
+    dataset_path = new_dataset_path()
+    sources = [job.url for job in jobs]
+    with ReviewSink(dataset_path, store=get_dataset_store(), sources=sources) as sink:
+        for job in jobs:
+            for chunk in job.checkpoint.iter_reviews(sink.chunk_size):
+                sink.write(chunk)
+
+    # Its aggregates are those each checkpoint keeps up to date as reviews are
+    # ingested, merged without reading the reviews again
+    aggregates = ReviewAggregates()
+    for job in jobs:
+        aggregates.merge(job.checkpoint.aggregates)
+    save_aggregates(dataset_path, aggregates)
+    publish_dataset(dataset_path, LATEST_DATASET)
+
+    # Datasets the store no longer keeps take their files with them
+    for expired_path in sink.expired:
+        if os.path.dirname(expired_path) == DATASETS_DIR:
+            remove_dataset_files(expired_path)
+    return sink.handle()
+
+
+# Job runner shared by every session of this server
+@st.cache_resource
+def get_job_runner():
+    return JobRunner()
+
+
+# Function to initiate scraping in the background
 def initiate_scraping(url):
-    reviews_csv = scrape_reviews([url])
-    st.session_state["reviews_csv"] = reviews_csv
+    runner = get_job_runner()
+    st.session_state["scrape_job"] = runner.submit(url, scrape_reviews, [url])
+
+
+# Show the live progress of this session's scrape job and tell whether it is
+# still running
+def show_scraping_progress():
+    job_id = st.session_state.get("scrape_job")
+    job = get_job_runner().get(job_id) if job_id else None
+    if job is None:
+        return False
+
+    progress = job.progress.snapshot()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Pages fetched", progress["pages_fetched"])
+    col2.metric("Reviews parsed", progress["reviews_parsed"])
+    col3.metric("Errors", len(progress["errors"]))
+    for error in progress["errors"][-5:]:
+        st.warning(error)
+
+    if not job.finished:
+        st.info(f"Scraping {job.description} ...")
+        return True
+
+    del st.session_state["scrape_job"]
+    if job.status == "done":
+        # Only a handle to the stored dataset is kept in the session
+        st.session_state["reviews_dataset"] = job.result
+        st.success("Scraped data has been updated!")
+    else:
+        st.error(f"Scraping failed: {job.error}")
+    return False
 
-    st.success("Scraped data has been updated!")
+
+# This session's dataset, or None when it has not scraped one or the dataset
+# has since been dropped
+def session_dataset():
+    dataset = st.session_state.get("reviews_dataset")
+    if dataset and dataset.rows and os.path.exists(dataset.csv_path):
+        return dataset
+    return None
 
 
 # Function to display the CSV content
 def display_csv():
-    data = load_data()
+    dataset = session_dataset()
+    if dataset is None:
+        st.error("No data available. Please scrape some data first.")
+        return
+    path = dataset.csv_path
+    fingerprint = file_fingerprint(path)
+    load_data(path, fingerprint)
 
     st.title("Data Visualization")
 
-    plot_rating_distribution(data)
+    aggregates = load_aggregates(path)
+    show_review_summary(aggregates)
+    plot_rating_distribution(path, aggregates, fingerprint)
 
-    plot_wordcloud(data)
+    plot_wordcloud(path, fingerprint)
+
+    show_review_search(dataset, fingerprint)
+
+    show_dataset_viewer(dataset)
 
-    if "reviews_csv" in st.session_state and st.session_state["reviews_csv"]:
-        df = pd.read_csv(StringIO(st.session_state["reviews_csv"]))
-        st.dataframe(df.head(10))
-    else:
-        st.error("No data available. Please scrape some data first.")
+
+# Browse the session's dataset a page at a time; filtering and sorting run in
+# the shared dataset store, so a session only ever holds the page it shows
+def show_dataset_viewer(dataset, page_size=50):
+    store = get_dataset_store()
+    if not store.exists(dataset.dataset_id):
+        st.error("This dataset is no longer available. Please scrape again.")
+        return
+
+    st.markdown("#### Scraped Reviews", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    text = col1.text_input("Comments containing")
+    min_rating, max_rating = col2.slider("Rating", 1, 5, (1, 5))
+    sort_by = col3.selectbox("Sort by", list(SORT_KEYS))
+    descending = col4.checkbox("Descending")
+
+    # The full range also keeps reviews without a rating
+    filters = {
+        "min_rating": min_rating if min_rating > 1 else None,
+        "max_rating": max_rating if max_rating < 5 else None,
+        "text": text,
+    }
+    total = store.count(dataset.dataset_id, **filters)
+    pages = max(1, -(-total // page_size))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1)
+    rows = store.page(
+        dataset.dataset_id,
+        page - 1,
+        page_size,
+        sort_by=sort_by,
+        descending=descending,
+        **filters,
+    )
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    st.caption(f"{total} matching reviews, page {page} of {pages}")
 
 
 # Function to download the CSV file
 def download_csv():
-    if "reviews_csv" in st.session_state and st.session_state["reviews_csv"]:
-        st.download_button(
-            label="Download CSV",
-            data=st.session_state["reviews_csv"],
-            file_name="Cleaned_reviews.csv",
-            mime="text/csv",
-        )
+    dataset = session_dataset()
+    if dataset is not None:
+        with open(dataset.csv_path, "rb") as file:
+            st.download_button(
+                label="Download CSV",
+                data=file,
+                file_name="Cleaned_reviews.csv",
+                mime="text/csv",
+            )
     else:
         st.error("No data available to download.")
 
 
 def view_product_specification():
+    import docx
+    from dotenv import load_dotenv
 
     load_dotenv()
 
-    loader = TextLoader("unique_negative_keywords.txt")
-    document = loader.load()
+    dataset = session_dataset()
+    if dataset is None:
+        st.error("No data available. Please scrape some data first.")
+        return
+
+    # A short ranked list of negative key phrases instead of the whole
+    # keywords file keeps the prompt small
+    path = dataset.csv_path
+    phrases = negative_key_phrases(path, file_fingerprint(path))
+    print(f"Sending {len(phrases)} key phrases")
 
-    improvement_suggestions = generate_improvement_suggestions(document)
+    improvement_suggestions = generate_improvement_suggestions(", ".join(phrases))
 
     print(improvement_suggestions)
 
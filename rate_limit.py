@@ -0,0 +1,138 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+# Requests per second allowed to a single host when it is not pushing back
+DEFAULT_RATE = 2.0
+
+# Number of requests that may be sent back to back before the rate applies
+DEFAULT_BURST = 4
+
+# Slowest rate we fall back to while a host keeps throttling us
+MIN_RATE = 0.1
+
+# Longest pause applied after a throttling response
+MAX_BACKOFF = 60.0
+
+# Status codes that mean the host wants us to slow down
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Path fragments of the captcha and sign-in pages sites redirect to when they
+# think we are a bot
+BLOCK_PATH_MARKERS = ("captcha", "signin", "sign-in", "login", "/errors/")
+
+
+# Raised for a throttled or blocked response, so callers treat the page as
+# failed (to be retried later) rather than as a page without reviews
+class Throttled(Exception):
+    pass
+
+
+# Token bucket for one host; the rate shrinks on throttling and recovers slowly
+class TokenBucket:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.strikes = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Block until a request may be sent
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(
+                    self.paused_until - now, (1 - self.tokens) / self.rate, 0.01
+                )
+            time.sleep(wait)
+
+    # Halve the rate and pause the host, honouring Retry-After when given
+    def backoff(self, retry_after=None):
+        with self.lock:
+            self.strikes += 1
+            self.rate = max(MIN_RATE, self.rate / 2)
+            delay = retry_after if retry_after is not None else 2**self.strikes
+            delay = min(MAX_BACKOFF, delay)
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.tokens = 0.0
+
+    # Step the rate back up towards the base rate after a normal response
+    def recover(self):
+        with self.lock:
+            self.strikes = 0
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+def _host(url):
+    host = urlparse(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+# A redirect to another site or to a captcha or sign-in page; redirects within
+# the site, such as http to https or to a canonical product slug, are benign
+def _is_block_redirect(url, final_url):
+    if _host(final_url) != _host(url):
+        return True
+    path = urlparse(final_url).path.lower()
+    return any(marker in path for marker in BLOCK_PATH_MARKERS)
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# Politeness limiter shared by all scrapers, keeping one token bucket per host
+class HostRateLimiter:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).hostname
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        self.bucket(url).acquire()
+
+    # Adapt the host's rate to the response we got for the requested url, and
+    # raise Throttled when the host throttled or blocked us
+    def record_response(self, url, response):
+        bucket = self.bucket(url)
+        if response.status_code in THROTTLE_STATUS_CODES:
+            bucket.backoff(_retry_after(response))
+            raise Throttled(
+                f"Throttled by {urlparse(url).hostname} ({response.status_code})"
+            )
+        if response.history and _is_block_redirect(url, response.url):
+            # Sites redirect to captcha or sign-in pages when we go too fast
+            bucket.backoff()
+            raise Throttled(f"Redirected to {response.url} instead of {url}")
+        if response.history:
+            print(f"Redirected from {url} to {response.url}")
+        bucket.recover()
+
+
+limiter = HostRateLimiter()
@@ -1,13 +1,14 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import os
+from storage import read_columns
+from aggregates import load_aggregates
 
 
 def read_ratings_from_csv(filename):
     if os.path.exists(filename):
-        df = pd.read_csv(filename)
+        df = read_columns(filename, ["Rating"])
         new_ratings = df["Rating"].tolist()
         return new_ratings
     else:
@@ -79,16 +80,22 @@ def compare_products():
         5,
         1,
     ]
-    new_ratings = read_ratings_from_csv("outputs/feedback.csv")
-
     old_avg_rating = np.mean(old_ratings)
-    new_avg_rating = np.mean(new_ratings)
-
     old_positive_reviews = sum(1 for rating in old_ratings if rating >= 4)
-    new_positive_reviews = sum(1 for rating in new_ratings if rating >= 4)
-
     old_negative_reviews = sum(1 for rating in old_ratings if rating <= 3)
-    new_negative_reviews = sum(1 for rating in new_ratings if rating <= 3)
+
+    feedback_file = "outputs/feedback.csv"
+    if os.path.exists(feedback_file):
+        # Summary kept up to date as feedback is submitted
+        aggregates = load_aggregates(feedback_file, text_key="Review")
+        new_avg_rating = aggregates.mean_rating()
+        new_positive_reviews = aggregates.count_ratings(low=4)
+        new_negative_reviews = aggregates.count_ratings(high=3)
+    else:
+        new_ratings = read_ratings_from_csv(feedback_file)
+        new_avg_rating = np.mean(new_ratings)
+        new_positive_reviews = sum(1 for rating in new_ratings if rating >= 4)
+        new_negative_reviews = sum(1 for rating in new_ratings if rating <= 3)
 
     positive_change = new_positive_reviews - old_positive_reviews
     negative_change = new_negative_reviews - old_negative_reviews
@@ -96,6 +103,25 @@ def compare_products():
     return old_avg_rating, new_avg_rating, positive_change, negative_change
 
 
+# Rendered comparison charts, keyed by the averages they show
+@st.cache_data(max_entries=16, show_spinner=False)
+def comparison_chart_image(old_avg_rating, new_avg_rating):
+    from charts import bar_chart_png
+
+    comparison = pd.Series(
+        [old_avg_rating, new_avg_rating],
+        index=pd.Index(["Old", "New"], name="Product"),
+        name="Average Rating",
+    )
+    return bar_chart_png(
+        comparison,
+        "Average Rating Comparison",
+        "Product",
+        "Average Rating",
+        color=["blue", "green"],
+    )
+
+
 def main():
     st.title("Product Comparison Analysis")
 
@@ -112,19 +138,8 @@ def main():
     st.write(f"Change in number of negative ratings: {negative_change}")
 
     # Visualize comparison with bar chart
-    comparison_df = pd.DataFrame(
-        {"Product": ["Old", "New"], "Average Rating": [old_avg_rating, new_avg_rating]}
-    )
-
     st.write("### Comparison Visualization:")
-    fig, ax = plt.subplots()
-    comparison_df.plot(
-        kind="bar", x="Product", y="Average Rating", ax=ax, color=["blue", "green"]
-    )
-    plt.xlabel("Product")
-    plt.ylabel("Average Rating")
-    plt.title("Average Rating Comparison")
-    st.pyplot(fig)
+    st.image(comparison_chart_image(old_avg_rating, new_avg_rating))
 
 
 if __name__ == "__main__":
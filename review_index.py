@@ -0,0 +1,175 @@
+import argparse
+import os
+import sqlite3
+import threading
+import pandas as pd
+from aggregates import review_rating
+from checkpoint import review_fingerprint
+from http_cache import normalize_url
+
+# Where the full-text index of every ingested review is kept
+REVIEW_INDEX_PATH = "Data/review_index.sqlite"
+
+# Number of matching reviews returned by a search
+DEFAULT_LIMIT = 50
+
+# Layout of the index; an index with an older one is dropped and rebuilt from
+# the checkpoints as their products are scraped again
+INDEX_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    source TEXT,
+    name TEXT,
+    rating INTEGER,
+    comments TEXT,
+    UNIQUE (fingerprint, source)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS review_text USING fts5(
+    comments, content='reviews', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS reviews_indexed AFTER INSERT ON reviews BEGIN
+    INSERT INTO review_text (rowid, comments) VALUES (new.id, new.comments);
+END;
+CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY);
+"""
+
+_DROP = """
+DROP TRIGGER IF EXISTS reviews_indexed;
+DROP TABLE IF EXISTS review_text;
+DROP TABLE IF EXISTS reviews;
+DROP TABLE IF EXISTS sources;
+"""
+
+
+# Turn what an analyst typed into an FTS5 query: the words must appear as a
+# phrase, and with prefix=True its last word may be the start of a longer one
+def phrase_query(text, prefix=False):
+    words = str(text).split()
+    if not words:
+        return None
+    query = '"' + " ".join(words).replace('"', '""') + '"'
+    return query + "*" if prefix else query
+
+
+def _sources(sources):
+    return [normalize_url(source) for source in sources]
+
+
+# Persistent inverted index over review comments (SQLite FTS5). Reviews are
+# keyed by their fingerprint and product, the normalized product URL, so
+# adding a review twice indexes it once and every spelling of a product's URL
+# finds its reviews
+class ReviewIndex:
+    def __init__(self, path=REVIEW_INDEX_PATH):
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version < INDEX_VERSION:
+                self.connection.executescript(_DROP)
+            self.connection.executescript(_SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    # Index reviews and return how many were not indexed before
+    def add_reviews(self, reviews, source=None):
+        # Reviews without a product still have to be unique, and NULLs never are
+        source = normalize_url(source) if source else ""
+        rows = [
+            (
+                review_fingerprint(review),
+                source,
+                review.get("Name"),
+                review_rating(review.get("Rating")),
+                str(review.get("Comments", "")),
+            )
+            for review in reviews
+        ]
+        with self.lock, self.connection:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO reviews "
+                "(fingerprint, source, name, rating, comments) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return max(cursor.rowcount, 0)
+
+    # Index the reviews a checkpoint stored before its product was indexed;
+    # afterwards the scrape hands new reviews over as they are ingested
+    def add_checkpoint(self, checkpoint, chunk_size=1000):
+        source = normalize_url(checkpoint.url)
+        with self.lock:
+            known = self.connection.execute(
+                "SELECT 1 FROM sources WHERE source = ?", (source,)
+            ).fetchone()
+        if known:
+            return 0
+        added = 0
+        for chunk in checkpoint.iter_reviews(chunk_size):
+            added += self.add_reviews(chunk, source=source)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO sources (source) VALUES (?)", (source,)
+            )
+        return added
+
+    # Reviews matching an FTS5 query, best match first, with the matched words
+    # highlighted in markdown bold; sources limits them to those products
+    def search(self, query, limit=DEFAULT_LIMIT, sources=None):
+        sql = (
+            "SELECT r.name, r.rating, r.comments, r.source, "
+            "snippet(review_text, 0, '**', '**', '...', 24) "
+            "FROM review_text JOIN reviews r ON r.id = review_text.rowid "
+            "WHERE review_text MATCH ?"
+        )
+        params = [query]
+        if sources is not None:
+            sql += f" AND r.source IN ({', '.join('?' * len(sources))})"
+            params.extend(_sources(sources))
+        sql += " ORDER BY bm25(review_text) LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        return pd.DataFrame(
+            rows, columns=["Name", "Rating", "Comments", "Source", "Snippet"]
+        )
+
+    def count(self, query, sources=None):
+        sql = (
+            "SELECT count(*) FROM review_text JOIN reviews r "
+            "ON r.id = review_text.rowid WHERE review_text MATCH ?"
+        )
+        params = [query]
+        if sources is not None:
+            sql += f" AND r.source IN ({', '.join('?' * len(sources))})"
+            params.extend(_sources(sources))
+        with self.lock:
+            return self.connection.execute(sql, params).fetchone()[0]
+
+
+_review_index = None
+_review_index_lock = threading.Lock()
+
+
+def get_review_index():
+    global _review_index
+    with _review_index_lock:
+        if _review_index is None:
+            _review_index = ReviewIndex()
+    return _review_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the indexed reviews")
+    parser.add_argument("text")
+    parser.add_argument("--prefix", action="store_true")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+    index = get_review_index()
+    query = phrase_query(args.text, args.prefix)
+    print(f"{index.count(query)} matching reviews")
+    for row in index.search(query, args.limit).itertuples():
+        print(f"[{row.Rating}] {row.Snippet}")
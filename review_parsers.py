@@ -0,0 +1,244 @@
+import os
+import re
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# "xpath" walks a raw lxml tree with precompiled selectors, "strainer" only
+# builds BeautifulSoup trees for the review containers and "full" parses the
+# whole page the way the scrapers used to (kept as the reference)
+PARSER_BACKENDS = ("xpath", "strainer", "full")
+
+DEFAULT_BACKEND = os.environ.get(
+    "REVIEW_PARSER", "xpath" if lxml_html is not None else "strainer"
+)
+
+READ_MORE = re.compile(r"\s*READ\s+MORE\s*")
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml_html is not None:
+    AMAZON_XPATH = {
+        "review": etree.XPath(
+            "//div[normalize-space(@class)='a-section review aok-relative']"
+        ),
+        "name": etree.XPath(f"(.//span[{_has_class('a-profile-name')}])[1]"),
+        "rating": etree.XPath("(.//i[@data-hook='review-star-rating'])[1]"),
+        "comments": etree.XPath(
+            "(.//div[normalize-space(@class)='a-row a-spacing-small review-data'])[1]"
+        ),
+    }
+    FLIPKART_XPATH = {
+        "review": etree.XPath(f"//div[{_has_class('_27M-vq')}]"),
+        "name": etree.XPath("(.//p[normalize-space(@class)='_2sc7ZR _2V5EHH'])[1]"),
+        "rating": etree.XPath(f"(.//div[{_has_class('_3LWZlK')}])[1]"),
+        "comments": etree.XPath(f"(.//div[{_has_class('t-ZTKy')}])[1]"),
+    }
+    # Text of an element the way BeautifulSoup's .text reads it, which leaves
+    # out scripts, styles and templates
+    VISIBLE_TEXT = etree.XPath(
+        ".//text()[not(ancestor::script or ancestor::style or ancestor::template)]"
+    )
+    SNAPDEAL_XPATH = {
+        "review": etree.XPath(f"//div[{_has_class('user-review')}]"),
+        "stars": etree.XPath(
+            "count(.//i[normalize-space(@class)='sd-icon sd-icon-star active'])"
+        ),
+        "name": etree.XPath(f"(.//div[{_has_class('_reviewUserName')}])[1]"),
+        "comments": etree.XPath("(.//p)[1]"),
+    }
+
+
+def _first(selector, node):
+    found = selector(node)
+    return found[0] if found else None
+
+
+def _text(element):
+    return "".join(VISIBLE_TEXT(element))
+
+
+# Decode the page the way BeautifulSoup does (declared charset, then byte
+# sniffing) so pages without a charset are not read as Latin-1
+def _lxml_tree(content):
+    if not content or not content.strip():
+        return None
+    if isinstance(content, str):
+        return lxml_html.document_fromstring(content)
+    dammit = UnicodeDammit(content, is_html=True)
+    try:
+        return lxml_html.document_fromstring(dammit.unicode_markup)
+    except ValueError:
+        # Unicode strings with an XML encoding declaration are refused
+        parser = lxml_html.HTMLParser(encoding=dammit.original_encoding)
+        return lxml_html.document_fromstring(content, parser=parser)
+
+
+def _soup(content, parser, backend, container):
+    if backend == "strainer":
+        return BeautifulSoup(content, parser, parse_only=_strainer(*container))
+    return BeautifulSoup(content, parser)
+
+
+# The class attribute reaches a SoupStrainer before it is split into tokens, so
+# match it the way find_all does: the whole value or any single class name
+def _strainer(tag, attrs):
+    wanted = attrs["class"]
+
+    def match_class(value):
+        if value is None:
+            return False
+        if not isinstance(value, str):
+            value = " ".join(value)
+        return value == wanted or wanted in value.split()
+
+    return SoupStrainer(tag, class_=match_class)
+
+
+# Amazon review parsing
+
+
+AMAZON_REVIEW = ("div", {"class": "a-section review aok-relative"})
+
+
+def _amazon_record(name, rating_text, comments):
+    return {
+        "Name": name.strip(),
+        "Rating": int(float(rating_text.strip().split(" ")[0])),
+        "Comments": comments.strip(),
+    }
+
+
+def parse_amazon_reviews(content, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    reviews = []
+    if backend == "xpath":
+        tree = _lxml_tree(content)
+        if tree is None:
+            return reviews
+        for review in AMAZON_XPATH["review"](tree):
+            name = _first(AMAZON_XPATH["name"], review)
+            rating = _first(AMAZON_XPATH["rating"], review)
+            comments = _first(AMAZON_XPATH["comments"], review)
+            # Reviews missing any field are skipped rather than half recorded
+            if name is not None and rating is not None and comments is not None:
+                reviews.append(
+                    _amazon_record(_text(name), _text(rating), _text(comments))
+                )
+        return reviews
+
+    soup = _soup(content, "lxml", backend, AMAZON_REVIEW)
+    for review in soup.find_all(*AMAZON_REVIEW):
+        name_element = review.find("span", {"class": "a-profile-name"})
+        rating_element = review.find("i", {"data-hook": "review-star-rating"})
+        comments_element = review.find(
+            "div", {"class": "a-row a-spacing-small review-data"}
+        )
+
+        if name_element and rating_element and comments_element:
+            reviews.append(
+                _amazon_record(
+                    name_element.text, rating_element.text, comments_element.text
+                )
+            )
+    return reviews
+
+
+# Flipkart review parsing
+
+
+FLIPKART_REVIEW = ("div", {"class": "_27M-vq"})
+
+
+def _flipkart_record(name, rating, comments):
+    return {
+        "Name": name,
+        "Rating": rating,
+        "Comments": READ_MORE.sub("", comments).strip(),
+    }
+
+
+def parse_flipkart_reviews(content, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    reviews = []
+    if backend == "xpath":
+        tree = _lxml_tree(content)
+        if tree is None:
+            return reviews
+        for review in FLIPKART_XPATH["review"](tree):
+            name = _first(FLIPKART_XPATH["name"], review)
+            rating = _first(FLIPKART_XPATH["rating"], review)
+            comments = _first(FLIPKART_XPATH["comments"], review)
+            if name is not None and rating is not None and comments is not None:
+                reviews.append(
+                    _flipkart_record(_text(name), _text(rating), _text(comments))
+                )
+        return reviews
+
+    soup = _soup(content, "html.parser", backend, FLIPKART_REVIEW)
+    for review in soup.find_all(*FLIPKART_REVIEW):
+        name = review.find("p", {"class": "_2sc7ZR _2V5EHH"})
+        rating = review.find("div", {"class": "_3LWZlK"})
+        comments = review.find("div", {"class": "t-ZTKy"})
+        if name and rating and comments:
+            reviews.append(_flipkart_record(name.text, rating.text, comments.text))
+    return reviews
+
+
+# Snapdeal review parsing
+
+
+SNAPDEAL_REVIEW = ("div", {"class": "user-review"})
+
+# Snapdeal repeats the two top reviews before the actual review list
+SNAPDEAL_SKIPPED_REVIEWS = 2
+
+
+def parse_snapdeal_reviews(content, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    reviews = []
+    if backend == "xpath":
+        tree = _lxml_tree(content)
+        if tree is None:
+            return reviews
+        for review in SNAPDEAL_XPATH["review"](tree)[SNAPDEAL_SKIPPED_REVIEWS:]:
+            name = _first(SNAPDEAL_XPATH["name"], review)
+            comments = _first(SNAPDEAL_XPATH["comments"], review)
+            if name is not None and comments is not None:
+                reviews.append(
+                    {
+                        "Name": name.get("title"),
+                        "Rating": int(SNAPDEAL_XPATH["stars"](review)),
+                        "Comments": _text(comments),
+                    }
+                )
+        return reviews
+
+    soup = _soup(content, "html.parser", backend, SNAPDEAL_REVIEW)
+    for review in soup.find_all(*SNAPDEAL_REVIEW)[SNAPDEAL_SKIPPED_REVIEWS:]:
+        name = review.find("div", {"class": "_reviewUserName"})
+        comments = review.find("p")
+        if name and comments:
+            reviews.append(
+                {
+                    "Name": name.get("title"),
+                    "Rating": len(
+                        review.find_all("i", class_="sd-icon sd-icon-star active")
+                    ),
+                    "Comments": comments.text,
+                }
+            )
+    return reviews
+
+
+PARSERS = {
+    "amazon": parse_amazon_reviews,
+    "flipkart": parse_flipkart_reviews,
+    "snapdeal": parse_snapdeal_reviews,
+}
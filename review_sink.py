@@ -0,0 +1,166 @@
+import csv
+import os
+import shutil
+import threading
+import uuid
+from aggregates import AGGREGATES_SUFFIX, review_rating
+from checkpoint import REVIEW_FIELDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Number of reviews buffered in memory before they are appended to disk
+DEFAULT_CHUNK_SIZE = 1000
+
+_publish_lock = threading.Lock()
+
+if pa is not None:
+    REVIEW_SCHEMA = pa.schema(
+        [
+            ("Name", pa.string()),
+            ("Rating", pa.int64()),
+            ("Comments", pa.string()),
+        ]
+    )
+
+
+# Reference to a stored dataset, small enough to keep in the session state;
+# sources are the product URLs its reviews were scraped from
+class DatasetHandle:
+    def __init__(self, csv_path, parquet_path, rows, dataset_id=None, sources=()):
+        self.csv_path = csv_path
+        self.parquet_path = parquet_path
+        self.rows = rows
+        self.dataset_id = dataset_id
+        self.sources = list(sources)
+
+    def __repr__(self):
+        return f"DatasetHandle({self.csv_path!r}, rows={self.rows})"
+
+
+# Append-only review writer with bounded memory: reviews are buffered up to
+# chunk_size and then appended to a CSV file, to a Parquet file as a new row
+# group when pyarrow is installed, and to a DatasetStore when one is given
+class ReviewSink:
+    def __init__(
+        self,
+        csv_path,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        parquet=True,
+        store=None,
+        sources=(),
+    ):
+        self.csv_path = csv_path
+        self.sources = list(sources)
+        self.parquet_path = None
+        if parquet and pa is not None:
+            self.parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.rows = 0
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        # Write to temporary files so readers keep seeing the previous dataset
+        # until the new one is complete; the names are unique so concurrent
+        # scrapes never write into each other's files
+        self.tmp_suffix = f".{uuid.uuid4().hex}.tmp"
+        self.csv_file = open(
+            f"{csv_path}{self.tmp_suffix}", "w", newline="", encoding="utf-8"
+        )
+        self.writer = csv.DictWriter(
+            self.csv_file, fieldnames=REVIEW_FIELDS, extrasaction="ignore"
+        )
+        self.writer.writeheader()
+        self.parquet_writer = None
+        if self.parquet_path:
+            self.parquet_writer = pq.ParquetWriter(
+                f"{self.parquet_path}{self.tmp_suffix}", REVIEW_SCHEMA
+            )
+        self.store = store
+        self.dataset_id = store.create(csv_path) if store is not None else None
+        # Sources of the datasets the store dropped when this one completed
+        self.expired = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, reviews):
+        self.buffer.extend(reviews)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self.writer.writerows(self.buffer)
+        self.csv_file.flush()
+        columns = {
+            "Name": [str(review.get("Name", "")) for review in self.buffer],
+            "Rating": [review_rating(review.get("Rating")) for review in self.buffer],
+            "Comments": [str(review.get("Comments", "")) for review in self.buffer],
+        }
+        if self.parquet_writer is not None:
+            self.parquet_writer.write_table(pa.table(columns, schema=REVIEW_SCHEMA))
+        if self.store is not None:
+            self.store.append(
+                self.dataset_id,
+                zip(columns["Name"], columns["Rating"], columns["Comments"]),
+                self.rows,
+            )
+        self.rows += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.csv_file.close()
+        os.replace(f"{self.csv_path}{self.tmp_suffix}", self.csv_path)
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            os.replace(f"{self.parquet_path}{self.tmp_suffix}", self.parquet_path)
+        if self.store is not None:
+            self.expired = self.store.complete(self.dataset_id, self.rows)
+        return self.handle()
+
+    def abort(self):
+        self.csv_file.close()
+        os.remove(f"{self.csv_path}{self.tmp_suffix}")
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            os.remove(f"{self.parquet_path}{self.tmp_suffix}")
+        if self.store is not None:
+            self.store.discard(self.dataset_id)
+
+    def handle(self):
+        return DatasetHandle(
+            self.csv_path, self.parquet_path, self.rows, self.dataset_id, self.sources
+        )
+
+
+# Make path the same file as source, replacing it atomically; a hard link
+# costs no copy, and the file is copied where links are not supported
+def _link_file(source, path):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Publish a finished dataset's CSV, Parquet and aggregates files under the
+# names of csv_path, where scripts and notebooks read the latest dataset
+def publish_dataset(dataset_path, csv_path):
+    stem = os.path.splitext(dataset_path)[0]
+    published_stem = os.path.splitext(csv_path)[0]
+    with _publish_lock:
+        for suffix in (".parquet", AGGREGATES_SUFFIX, ".csv"):
+            if os.path.exists(stem + suffix):
+                _link_file(stem + suffix, published_stem + suffix)
@@ -1,163 +1,214 @@
+import argparse
 import csv
-import requests
-from bs4 import BeautifulSoup
-import time
+import hashlib
+import json
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fetch_engine import PAGE_SUFFIXES
+from http_client import fetch
+from link_cache import cached_search, resolve_queries
+from review_parsers import (
+    parse_amazon_reviews,
+    parse_flipkart_reviews,
+    parse_snapdeal_reviews,
+)
 from langchain_community.tools import DuckDuckGoSearchResults
 
 # Initialize the DuckDuckGo API Wrapper
 ddg_api = DuckDuckGoSearchResults()
 
-# Function to search for a product link
+
+def product_query(product_name, site):
+    return f"site:{site} {product_name} buy {site}"
+
+
+# Run a DuckDuckGo search and return the first link, or None
+def search_first_link(query):
+    results = ddg_api.api_wrapper.results(query, max_results=1)
+    return results[0]['link'] if results else None
+
+
+# Function to search for a product link; results are cached with a TTL
 def search_product_link(product_name, site):
-    query = f"site:{site} {product_name} buy {site}"
-    results = ddg_api.run(query, max_results=1)
-    if results:
-        print(f"Found link: {results[0]['link']}")
-        return results[0]['link']
+    link = cached_search(product_query(product_name, site), search_first_link)
+    if link:
+        print(f"Found link: {link}")
     else:
         print("No results found.")
-        return None
+    return link
 
-# Amazon review scraping function
-def amazon_review_scraper(url, page):
-    reviews = []
-    with requests.Session() as session:
-        # Set a user agent to mimic a web browser
-        session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0"
-            }
-        )
-        url = f"{url}&pageNumber={page}"
-        print(f"Accessing {url}")  # Debugging statement
-        response = session.get(url)
-        if response.url != url:
-            print(f"Redirected to {response.url} instead of {url}")
-        soup = BeautifulSoup(response.content, "lxml")
-
-        for review in soup.find_all("div", {"class": "a-section review aok-relative"}):
-            name_element = review.find("span", {"class": "a-profile-name"})
-            rating_element = review.find("i", {"data-hook": "review-star-rating"})
-            comments_element = review.find(
-                "div", {"class": "a-row a-spacing-small review-data"}
-            )
-
-            if name_element and rating_element and comments_element:
-                rating_text = rating_element.text.strip()
-                rating = int(float(rating_text.split(" ")[0]))
-                review_data = {
-                    "Name": name_element.text.strip(),
-                    "Rating": rating,
-                    "Comments": comments_element.text.strip(),
-                }
-            reviews.append(review_data)
 
-            time.sleep(1)
+# Resolve the links of a whole catalog up front, searching each distinct
+# query once and only when it is not cached yet
+def resolve_product_links(products, sites):
+    queries = [product_query(product, site) for product in products for site in sites]
+    return resolve_queries(queries, search_first_link)
 
-    return reviews
+
+# Amazon review scraping function; url is the review page to fetch
+def amazon_review_scraper(url, page):
+    print(f"Accessing {url}")  # Debugging statement
+    response = fetch(url)
+    return parse_amazon_reviews(response.content)
 
 
 # Flipkart review scraping function
 def flipkart_review_scraper(url, page):
-    url = f"{url}{page}"
-
-    reviews = []
-
-    user_agent = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0"
-    }
-
-    response = requests.get(url=url, headers=user_agent)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    for review in soup.find_all(
-        "div", {"class": "_27M-vq"}
-    ):  # Updated class for review container
-        name = review.find(
-            "p", {"class": "_2sc7ZR _2V5EHH"}
-        ).text  # Updated class for reviewer's name
-        rating = review.find(
-            "div", {"class": "_3LWZlK"}
-        ).text  # Updated class for rating
-        comments = review.find(
-            "div", {"class": "t-ZTKy"}
-        ).text  # Updated class for review comments
-        comments = re.sub(
-            r"\s*READ\s+MORE\s*", "", comments
-        )  # Remove 'READ MORE' links if present
-
-        data = {
-            "Name": name,
-            "Rating": rating,
-            "Comments": comments.strip(),
-        }
-
-        reviews.append(data)
-
-    return reviews
+    response = fetch(url)
+    return parse_flipkart_reviews(response.content)
 
 
 # Snapdeal review scraping function
 def snapdeal_review_scraper(url, page):
-    url = f"{url}{page}"
-    reviews = []
-
-    user_agent = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0"
-    }
+    response = fetch(url)
+    return parse_snapdeal_reviews(response.content)
 
-    response = requests.get(url=url, headers=user_agent)
-    soup = BeautifulSoup(response.content, "html.parser")
 
-    reviews_skipped = 0  # Counter to track the number of reviews skipped
+# Site scraper used for each site we search
+scrape_functions = {
+    'amazon.in': amazon_review_scraper,
+    'flipkart.com': flipkart_review_scraper,
+    'snapdeal.com': snapdeal_review_scraper
+}
 
-    for review in soup.find_all("div", {"class": "user-review"}):
-        if reviews_skipped < 2:
-            reviews_skipped += 1
-            continue  # Skip the first two reviews
-
-        rating_elements = review.find_all("i", class_="sd-icon sd-icon-star active")
-        rating = len(rating_elements)
-        name = review.find("div", {"class": "_reviewUserName"}).get("title")
-        comments = review.find("p").text
-
-        data = {
-            "Name": name,
-            "Rating": rating,
-            "Comments": comments,
-        }
 
-        reviews.append(data)
-
-    return reviews
+# Search one site for the product and scrape its reviews
+def search_and_scrape(product_name, site):
+    url = search_product_link(product_name, site)
+    if not url:
+        print(f"No results found for {product_name} on {site}")
+        return []
+    print(f"Scraping reviews from {url}")
+    page_url = f"{url}{PAGE_SUFFIXES[site.split('.')[0]]}1"
+    return scrape_functions[site](page_url, 1)
 
 
 # Integration of the full process
-def extract_and_save_reviews(product_name):
-    sites = ['amazon.com', 'flipkart.com', 'snapdeal.com']
-    scrape_functions = {
-        'amazon.in': amazon_review_scraper,
-        'flipkart.com': flipkart_review_scraper,
-        'snapdeal.com': snapdeal_review_scraper
-    }
-
-    with open('product_reviews.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['Product Name', 'Site', 'Name', 'Rating', 'Comments'])
-
-        for site in sites:
-            url = search_product_link(product_name, site)
-            if url:
-                print(f"Scraping reviews from {url}")
-                reviews = scrape_functions[site](url, 1)
+def extract_and_save_reviews(product_name, output_file='product_reviews.csv'):
+    sites = list(scrape_functions)
+    written = 0
+    failed_sites = []
+
+    # Search and scrape every site at once; the file is only written from this
+    # thread, in site order, as soon as each site's reviews are ready
+    with ThreadPoolExecutor(max_workers=len(sites)) as executor:
+        futures = [
+            executor.submit(search_and_scrape, product_name, site) for site in sites
+        ]
+
+        with open(output_file, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Product Name', 'Site', 'Name', 'Rating', 'Comments'])
+
+            for site, future in zip(sites, futures):
+                try:
+                    reviews = future.result()
+                except Exception as e:
+                    print(f"Failed to scrape {product_name} on {site}: {e}")
+                    failed_sites.append(site)
+                    continue
                 for review in reviews:
                     writer.writerow([product_name, site, review['Name'], review['Rating'], review['Comments']])
-            else:
-                print(f"No results found for {product_name} on {site}")
-
-# Example usage
-product_name = "Samsung Galaxy S22"
-extract_and_save_reviews(product_name)
+                written += len(reviews)
+    return written, failed_sites
+
+
+# Read a catalog: a CSV with a "Product Name" column or one product per line
+def read_catalog(catalog_file):
+    with open(catalog_file, newline='', encoding='utf-8') as file:
+        if catalog_file.endswith('.csv'):
+            products = [row['Product Name'] for row in csv.DictReader(file)]
+        else:
+            products = [line for line in file]
+    products = [product.strip() for product in products]
+    # Keep the first occurrence of each product, in catalog order
+    return list(dict.fromkeys(product for product in products if product))
+
+
+# File name of a product's shard; the hash keeps similar names apart
+def shard_name(product_name):
+    slug = re.sub(r'[^a-z0-9]+', '-', product_name.lower()).strip('-')[:60]
+    digest = hashlib.sha1(product_name.encode('utf-8')).hexdigest()[:8]
+    return f"{slug}-{digest}.csv"
+
+
+def load_status(status_file):
+    if os.path.exists(status_file):
+        with open(status_file, encoding='utf-8') as file:
+            return json.load(file)
+    return {}
+
+
+def save_status(status_file, status):
+    tmp_file = f"{status_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump(status, file, indent=2)
+    os.replace(tmp_file, status_file)
+
+
+# Scrape one product into its shard; the shard only appears once every site
+# has been scraped, otherwise the product is retried on the next run
+def scrape_product_shard(product_name, output_dir):
+    shard_file = os.path.join(output_dir, shard_name(product_name))
+    tmp_file = f"{shard_file}.tmp"
+    reviews, failed_sites = extract_and_save_reviews(product_name, tmp_file)
+    if failed_sites:
+        os.remove(tmp_file)
+        raise RuntimeError(f"Failed to scrape {', '.join(failed_sites)}")
+    os.replace(tmp_file, shard_file)
+    return shard_file, reviews
+
+
+# Batch mode: scrape a whole catalog with a bounded pool of product workers,
+# one output shard per product and a status file that lets a crashed run
+# resume with only the products that are not done yet
+def batch_extract_reviews(catalog_file, output_dir='product_reviews', workers=8):
+    os.makedirs(output_dir, exist_ok=True)
+    status_file = os.path.join(output_dir, 'status.json')
+    status = load_status(status_file)
+
+    products = read_catalog(catalog_file)
+    pending = [p for p in products if status.get(p, {}).get('status') != 'done']
+    print(f"{len(products) - len(pending)} of {len(products)} products already done")
+    resolve_product_links(pending, list(scrape_functions))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(scrape_product_shard, product, output_dir): product
+            for product in pending
+        }
+        # Only this thread updates the status file
+        for future in as_completed(futures):
+            product = futures[future]
+            try:
+                shard_file, reviews = future.result()
+                status[product] = {
+                    'status': 'done',
+                    'shard': os.path.basename(shard_file),
+                    'reviews': reviews,
+                    'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                }
+            except Exception as e:
+                print(f"Failed to process {product}: {e}")
+                status[product] = {'status': 'failed', 'error': str(e)}
+            save_status(status_file, status)
+
+    failed = [p for p in products if status.get(p, {}).get('status') != 'done']
+    print(f"Batch finished: {len(products) - len(failed)} done, {len(failed)} failed")
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape product reviews")
+    parser.add_argument("product", nargs="?", default="Samsung Galaxy S22")
+    parser.add_argument("--catalog", help="product list to scrape in batch mode")
+    parser.add_argument("--output-dir", default="product_reviews")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.catalog:
+        batch_extract_reviews(args.catalog, args.output_dir, args.workers)
+    else:
+        extract_and_save_reviews(args.product)
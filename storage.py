@@ -0,0 +1,178 @@
+import argparse
+import ast
+import glob
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Rows converted per chunk when a CSV is turned into Parquet
+CONVERT_CHUNK_SIZE = 100_000
+
+
+def _literal(value):
+    try:
+        return ast.literal_eval(value) if isinstance(value, str) else {}
+    except (ValueError, SyntaxError):
+        return {}
+
+
+# VADER scores were stored as a dict repr; keep them as numeric columns
+def _expand_vader_scores(df):
+    if "scores" in df:
+        scores = df["scores"].map(_literal)
+        for key in ("neg", "neu", "pos", "compound"):
+            df[key] = scores.map(lambda score: score.get(key))
+    return df
+
+
+# Hugging Face predictions were stored as a dict repr of label and score
+def _expand_hf_sentiment(df):
+    if "sentiment" in df:
+        sentiment = df["sentiment"].map(_literal)
+        df["sentiment_label"] = sentiment.map(lambda result: result.get("label"))
+        df["sentiment_score"] = sentiment.map(lambda result: result.get("score"))
+    return df
+
+
+# Typed schema of each known dataset, keyed by CSV file name, with the
+# function that derives typed columns from text ones
+SCHEMAS = {}
+
+if pa is not None:
+    from review_sink import REVIEW_SCHEMA
+
+    REVIEW_COLUMNS = [
+        ("Rating", pa.int64()),
+        ("Comments", pa.string()),
+        ("Product Name", pa.string()),
+    ]
+    SCHEMAS = {
+        # Written directly as Parquet by the scrapers' review sink
+        "cleaned_reviews": (REVIEW_SCHEMA, None),
+        "processed_reviews": (
+            pa.schema(
+                REVIEW_COLUMNS
+                + [("Sentiment", pa.string()), ("color_score", pa.float64())]
+                + [
+                    (f"{aspect}_{kind}", pa.float64())
+                    for aspect in ("service", "price", "quality", "location")
+                    for kind in ("score", "rating")
+                ]
+            ),
+            None,
+        ),
+        "sentiment_analysis": (
+            pa.schema(
+                REVIEW_COLUMNS
+                + [
+                    ("type", pa.string()),
+                    ("compound", pa.float64()),
+                    ("pos", pa.float64()),
+                    ("neu", pa.float64()),
+                    ("neg", pa.float64()),
+                ]
+            ),
+            _expand_vader_scores,
+        ),
+        "sentiment_analysis_huggingface": (
+            pa.schema(
+                REVIEW_COLUMNS
+                + [
+                    ("sentiment_label", pa.string()),
+                    ("sentiment_score", pa.float64()),
+                ]
+            ),
+            _expand_hf_sentiment,
+        ),
+        "all_reviews_with_sentiment": (
+            pa.schema(
+                [
+                    ("Product_Review", pa.string()),
+                    ("predicted_gpt35", pa.string()),
+                ]
+            ),
+            None,
+        ),
+        "feedback": (
+            pa.schema([("Rating", pa.int64()), ("Review", pa.string())]),
+            None,
+        ),
+    }
+
+
+def parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def _dataset_name(csv_path):
+    return os.path.splitext(os.path.basename(csv_path))[0].lower()
+
+
+# The Parquet copy is rebuilt whenever the CSV has been written after it
+def is_stale(csv_path):
+    columnar_path = parquet_path(csv_path)
+    if not os.path.exists(columnar_path):
+        return True
+    return os.path.getmtime(columnar_path) < os.path.getmtime(csv_path)
+
+
+# Convert a CSV dataset to Parquet chunk by chunk, typed with its schema
+def convert(csv_path, chunk_size=CONVERT_CHUNK_SIZE):
+    schema, derive = SCHEMAS.get(_dataset_name(csv_path), (None, None))
+    columnar_path = parquet_path(csv_path)
+    tmp_path = f"{columnar_path}.{os.getpid()}.tmp"
+    writer = None
+    try:
+        chunks = pd.read_csv(csv_path, chunksize=chunk_size)
+    except pd.errors.EmptyDataError:
+        return None
+    try:
+        for chunk in chunks:
+            if derive is not None:
+                chunk = derive(chunk)
+            if schema is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                schema = table.schema
+            else:
+                table = pa.Table.from_pandas(
+                    chunk, schema=schema, preserve_index=False
+                )
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # Nothing to convert: an empty CSV has no rows to type
+        return None
+    os.replace(tmp_path, columnar_path)
+    return columnar_path
+
+
+# Read only the requested columns of a dataset from its memory-mapped Parquet
+# copy, converting the CSV first if it changed; without pyarrow the CSV is read
+# with the same column projection
+def read_columns(csv_path, columns=None):
+    if pa is None:
+        try:
+            return pd.read_csv(csv_path, usecols=columns)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame(columns=columns)
+    if is_stale(csv_path) and convert(csv_path) is None:
+        return pd.DataFrame(columns=columns)
+    table = pq.read_table(parquet_path(csv_path), columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert CSV datasets to Parquet")
+    parser.add_argument("paths", nargs="*", default=glob.glob("data/*.csv"))
+    args = parser.parse_args()
+    for path in args.paths:
+        print(f"{path} -> {convert(path)}")
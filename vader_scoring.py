@@ -0,0 +1,143 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Reviews scored by one worker task
+DEFAULT_SHARD_SIZE = 2000
+
+# Rows read, scored and written at a time when scoring a file
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Below this many reviews a process pool costs more than it saves
+MIN_PARALLEL_REVIEWS = 5000
+
+SCORE_COLUMNS = ["compound", "pos", "neu", "neg"]
+
+LABELS = ["POS", "NEG", "NEUTRAL"]
+
+_analyzer = None
+
+
+def _get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        import nltk
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+        try:
+            _analyzer = SentimentIntensityAnalyzer()
+        except LookupError:
+            nltk.download("vader_lexicon", quiet=True)
+            _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+# Scores of one shard as an (n, 4) array in SCORE_COLUMNS order; runs in the
+# worker processes, each of which loads the lexicon once
+def _score_shard(texts):
+    analyzer = _get_analyzer()
+    scores = np.empty((len(texts), len(SCORE_COLUMNS)))
+    for i, text in enumerate(texts):
+        polarity = analyzer.polarity_scores(text if isinstance(text, str) else "")
+        scores[i] = [polarity[column] for column in SCORE_COLUMNS]
+    return scores
+
+
+# The lexicon is loaded (and downloaded if needed) here first, so the workers
+# never download it concurrently and forked ones start with it loaded
+def new_executor(workers=None):
+    _get_analyzer()
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+
+
+# VADER scores of the texts as typed float columns. Texts are split into
+# shards scored on the executor's processes; without an executor, or for few
+# texts, they are scored in this process
+def score_texts(texts, executor=None, shard_size=DEFAULT_SHARD_SIZE):
+    texts = list(texts)
+    if executor is None or len(texts) < MIN_PARALLEL_REVIEWS:
+        shards = [_score_shard(texts)]
+    else:
+        shards = list(
+            executor.map(
+                _score_shard,
+                [texts[i : i + shard_size] for i in range(0, len(texts), shard_size)],
+            )
+        )
+    scores = np.concatenate(shards) if texts else np.empty((0, len(SCORE_COLUMNS)))
+    return pd.DataFrame(scores, columns=SCORE_COLUMNS)
+
+
+# POS, NEG or NEUTRAL by the sign of the compound score
+def label_types(compound):
+    compound = np.asarray(compound)
+    labels = np.select([compound > 0, compound < 0], LABELS[:2], default=LABELS[2])
+    return pd.Categorical(labels, categories=LABELS)
+
+
+# Add the score columns and the "type" label to a frame of reviews
+def score_frame(df, text_column="Comments", executor=None):
+    scores = score_texts(df[text_column], executor)
+    scores.index = df.index
+    return df.assign(type=label_types(scores["compound"]), **scores)
+
+
+def label_counts(types):
+    return pd.Series(types).value_counts().reindex(LABELS, fill_value=0)
+
+
+# Score a review file chunk by chunk on a process pool, write the scored
+# chunks to output_path as they are done and return the label counts
+def score_file(
+    input_path,
+    output_path,
+    text_column="Comments",
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    workers=None,
+):
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    counts = pd.Series(0, index=LABELS)
+    rows = 0
+    try:
+        chunks = pd.read_csv(input_path, chunksize=chunk_size)
+    except pd.errors.EmptyDataError:
+        return counts
+    try:
+        with new_executor(workers) as executor:
+            for chunk in chunks:
+                scored = score_frame(chunk, text_column, executor)
+                scored.to_csv(tmp_path, mode="a", header=rows == 0, index=False)
+                counts += label_counts(scored["type"])
+                rows += len(scored)
+                print(f"Scored {rows} reviews")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if rows:
+        os.replace(tmp_path, output_path)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score reviews with VADER")
+    parser.add_argument("input", nargs="?", default="data/cleaned_reviews.csv")
+    parser.add_argument("output", nargs="?", default="data/sentiment_analysis.csv")
+    parser.add_argument("--column", default="Comments")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    counts = score_file(
+        args.input, args.output, args.column, args.chunk_size, args.workers
+    )
+    elapsed = time.perf_counter() - start
+    total = int(counts.sum())
+    print(
+        f"Positive :{counts['POS']}  Negative :{counts['NEG']}   "
+        f"Neutral :{counts['NEUTRAL']}"
+    )
+    print(f"{total} reviews in {elapsed:.1f}s ({total / elapsed:.0f} reviews/s)")
@@ -1,24 +1,19 @@
-from dotenv import load_dotenv
-from langchain.prompts import PromptTemplate
-import docx
 import pandas as pd
-from langchain_openai import ChatOpenAI
-from sklearn.feature_extraction.text import CountVectorizer
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
 import streamlit as st
-from langchain_community.document_loaders import TextLoader
 from io import StringIO
-import requests
 from io import BytesIO
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import re
 import time
 
+# Heavy dependencies (langchain, docx, sklearn, wordcloud, matplotlib, bs4,
+# requests) are imported by the functions that use them, so a cold start only
+# pays for what the first page actually shows
+
 
 def load_data():
+    from sklearn.feature_extraction.text import CountVectorizer
+
     data = pd.read_csv("Data/cleaned_reviews.csv")
     data["feedback"] = data["Rating"].apply(lambda x: 1 if x > 2 else 0)
     data.dropna(inplace=True)
@@ -51,6 +46,8 @@ def load_data():
 
 # Visualization functions
 def plot_rating_distribution(data):
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots()
     data["Rating"].value_counts().plot.bar(color="red", ax=ax)
     plt.title("Rating Distribution Count")
@@ -63,6 +60,9 @@ def plot_rating_distribution(data):
 
 
 def plot_wordcloud(data):
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
     text = " ".join(review for review in data["Comments"])
     wordcloud = WordCloud(background_color="white").generate(text)
     fig = plt.figure(figsize=(10, 5))
@@ -75,6 +75,8 @@ def plot_wordcloud(data):
 
 
 def generate_improvement_suggestions(texts):
+    from langchain.prompts import PromptTemplate
+    from langchain_openai import ChatOpenAI
 
     template_string = """ You are an AI language model trained to analyze unique key phrases or words from the negative reviews of a product and generate snew product design for product improvements. \
     The unique key phrases or words from the negative reviews of a product are: {document} \
@@ -110,6 +112,8 @@ def generate_improvement_suggestions(texts):
 
 
 def read_word_document(file_path):
+    import docx
+
     doc = docx.Document(file_path)
     improvements = []
     temp_dict = {}
@@ -164,6 +168,9 @@ def determine_website(url):
 
 # Amazon review scraping function
 def amazon_review_scraper(url, page):
+    import requests
+    from bs4 import BeautifulSoup
+
     reviews = []
     with requests.Session() as session:
         # Set a user agent to mimic a web browser
@@ -203,6 +210,9 @@ def amazon_review_scraper(url, page):
 
 # Flipkart review scraping function
 def flipkart_review_scraper(url, page):
+    import requests
+    from bs4 import BeautifulSoup
+
     url = f"{url}{page}"
 
     reviews = []
@@ -244,6 +254,9 @@ def flipkart_review_scraper(url, page):
 
 # Snapdeal review scraping function
 def snapdeal_review_scraper(url, page):
+    import requests
+    from bs4 import BeautifulSoup
+
     url = f"{url}{page}"
     reviews = []
 
@@ -417,6 +430,9 @@ def download_csv():
 
 
 def view_product_specification():
+    import docx
+    from dotenv import load_dotenv
+    from langchain_community.document_loaders import TextLoader
 
     load_dotenv()
 